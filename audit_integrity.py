@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Перевірка цілісності ієрархії та даних статусів за один прохід
+Коди, батьківські коди, категорії та дати періодів усіх територій завантажуються
+однією проекцією на колекцію, після чого всі перевірки виконуються векторно
+(pandas) і зберігаються у машиночитному звіті
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from status_periods import connect_to_mongodb, DATABASE_NAME
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS
+from import_kodifikator import CATEGORY_TO_COLLECTION
+
+INTEGRITY_REPORT_FILE = 'integrity_report.json'
+
+# Допустимі колекції батька для кожного рівня (порожньо - територія верхнього рівня)
+# Міста категорії M можуть підпорядковуватись безпосередньо області
+# (у класифікаторі так, наприклад, Прип'ять і Чорнобиль у Київській області)
+EXPECTED_PARENT_COLLECTIONS = {
+    'level1_regions': (),
+    'level2_raions': ('level1_regions',),
+    'level3_hromadas': ('level2_raions',),
+    'level4_settlements': ('level3_hromadas', 'level1_regions'),
+    'level_additional_city_districts': ('level4_settlements',)
+}
+
+# Міста зі спеціальним статусом (Київ, Севастополь) безпосередньо містять
+# населені пункти та міські райони, тож їхні діти можуть пропускати рівні
+SPECIAL_STATUS_CATEGORY = 'K'
+
+ISSUE_TYPES = [
+    'orphan_parent',
+    'missing_parent',
+    'wrong_level',
+    'category_mismatch',
+    'duplicate_code',
+    'inverted_period'
+]
+
+def load_audit_frames(client):
+    """
+    Завантаження територій і дат їхніх періодів однією проекцією на колекцію
+    Повертає (territories, periods) як DataFrame
+    """
+    db = client[DATABASE_NAME]
+
+    projection = {'category': 1, 'parent_code': 1}
+    for history_field in HISTORY_FIELDS:
+        for field in ('status', 'start_date', 'end_date', 'import_id'):
+            projection[f"{history_field}.{field}"] = 1
+
+    territory_rows = []
+    period_rows = []
+    for collection_name in LEVEL_COLLECTIONS:
+        for doc in db[collection_name].find({}, projection):
+            territory_rows.append((doc['_id'], collection_name, doc.get('category'), doc.get('parent_code')))
+            for history_field in HISTORY_FIELDS:
+                for position, period in enumerate(doc.get(history_field) or []):
+                    period_rows.append((
+                        doc['_id'], collection_name, history_field, position, period.get('status'),
+                        period.get('start_date'), period.get('end_date'), period.get('import_id')
+                    ))
+
+    territories = pd.DataFrame(territory_rows, columns=['code', 'collection', 'category', 'parent_code'])
+    periods = pd.DataFrame(period_rows, columns=[
+        'code', 'collection', 'history_field', 'position', 'status', 'start_date', 'end_date', 'import_id'
+    ])
+    return territories, periods
+
+def _records(frame):
+    """
+    Рядки DataFrame як список словників для JSON (NaN -> None)
+    """
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def audit_hierarchy(territories):
+    """
+    Векторні перевірки ієрархії: словник тип проблеми -> DataFrame проблемних територій
+    """
+    depth = {collection_name: position for position, collection_name in enumerate(LEVEL_COLLECTIONS)}
+
+    # Для пошуку батька береться перше входження коду (дублікати звітуються окремо)
+    lookup = territories.drop_duplicates('code').set_index('code')
+    parent_collection = territories['parent_code'].map(lookup['collection'])
+    parent_category = territories['parent_code'].map(lookup['category'])
+    allowed_pairs = {
+        f"{collection_name}>{parent}"
+        for collection_name, parents in EXPECTED_PARENT_COLLECTIONS.items()
+        for parent in parents
+    }
+    allowed_parent = (territories['collection'] + '>' + parent_collection.fillna('')).isin(allowed_pairs)
+
+    has_parent = territories['parent_code'].notna()
+    orphan = has_parent & parent_collection.isna()
+    skips_to_special = (
+        (parent_category == SPECIAL_STATUS_CATEGORY)
+        & (parent_collection.map(depth) < territories['collection'].map(depth))
+    )
+    wrong_level = has_parent & ~orphan & ~allowed_parent & ~skips_to_special
+    missing_parent = ~has_parent & territories['collection'].map(EXPECTED_PARENT_COLLECTIONS).map(bool)
+
+    expected_collection = territories['category'].map(CATEGORY_TO_COLLECTION)
+    category_mismatch = expected_collection != territories['collection']
+    duplicate = territories['code'].duplicated(keep=False)
+
+    return {
+        'orphan_parent': territories[orphan],
+        'missing_parent': territories[missing_parent],
+        'wrong_level': territories.assign(parent_collection=parent_collection)[wrong_level],
+        'category_mismatch': territories.assign(expected_collection=expected_collection)[category_mismatch],
+        'duplicate_code': territories[duplicate].sort_values('code')
+    }
+
+def audit_periods(periods):
+    """
+    Періоди з датою кінця раніше за дату початку
+    """
+    start = pd.to_datetime(periods['start_date'], errors='coerce')
+    end = pd.to_datetime(periods['end_date'], errors='coerce')
+    return {'inverted_period': periods[start.notna() & end.notna() & (end < start)]}
+
+def audit_integrity(client, report_path=INTEGRITY_REPORT_FILE):
+    """
+    Повна перевірка цілісності зі збереженням звіту у JSON
+    Повертає звіт
+    """
+    print("\n🔍 ПЕРЕВІРКА ЦІЛІСНОСТІ ДАНИХ...")
+    started = time.perf_counter()
+
+    territories, periods = load_audit_frames(client)
+    loaded = time.perf_counter()
+
+    issues = {**audit_hierarchy(territories), **audit_periods(periods)}
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'database': DATABASE_NAME,
+        'territories': {
+            collection_name: int(count)
+            for collection_name, count in territories['collection'].value_counts().reindex(LEVEL_COLLECTIONS, fill_value=0).items()
+        },
+        'periods': len(periods),
+        'issue_counts': {issue_type: len(issues[issue_type]) for issue_type in ISSUE_TYPES},
+        'issues': {issue_type: _records(issues[issue_type]) for issue_type in ISSUE_TYPES},
+        'load_seconds': round(loaded - started, 3),
+        'audit_seconds': round(time.perf_counter() - loaded, 3)
+    }
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+    print(f"  Територій: {len(territories)}, періодів: {len(periods)}")
+    for issue_type, count in report['issue_counts'].items():
+        print(f"  {'⚠️ ' if count else '✅'} {issue_type}: {count}")
+    print(f"⏱️  Завантаження {report['load_seconds']:.2f} с, перевірка {report['audit_seconds']:.2f} с")
+    print(f"📄 Звіт збережено в {report_path}")
+
+    return report
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Перевірка цілісності ієрархії та даних статусів")
+    arg_parser.add_argument('-o', '--output', default=INTEGRITY_REPORT_FILE,
+                            help=f"Файл звіту, за замовчуванням {INTEGRITY_REPORT_FILE}")
+    args = arg_parser.parse_args()
+
+    print("🔍 ПЕРЕВІРКА ЦІЛІСНОСТІ ДАНИХ КАТОТТГ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        report = audit_integrity(client, args.output)
+        if any(report['issue_counts'].values()):
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
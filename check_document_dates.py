@@ -12,6 +12,8 @@ from urllib.parse import quote_plus
 from datetime import datetime
 import json
 
+from status_statistics import get_status_statistics
+
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 username = quote_plus("test")
 password = quote_plus("test")
@@ -35,73 +37,26 @@ def connect_to_mongodb():
 def check_document_dates(client):
     """
     Перевірка та відображення дат документів у базі даних
+    (одна агрегація на сервері, див. status_statistics)
     """
-    db = client[DATABASE_NAME]
-    
-    collections = [
-        'level1_regions',
-        'level2_raions', 
-        'level3_hromadas',
-        'level4_settlements',
-        'level_additional_city_districts'
-    ]
-    
     print("\n📅 ПЕРЕВІРКА ДАТ ДОКУМЕНТІВ У БАЗІ ДАНИХ")
     print("=" * 60)
     
-    all_document_dates = set()
-    territories_with_dates = 0
-    territories_without_dates = 0
-    status_records_with_dates = 0
-    status_records_without_dates = 0
+    statistics = get_status_statistics(client)
     
-    for collection_name in collections:
+    for collection_name, counts in statistics['collections'].items():
         print(f"\n📊 Колекція: {collection_name}")
         print("-" * 40)
-        
-        collection = db[collection_name]
-        
-        # Знаходимо території з історією статусів
-        territories = collection.find({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        collection_territories_with_dates = 0
-        collection_territories_without_dates = 0
-        collection_records_with_dates = 0
-        collection_records_without_dates = 0
-        
-        for territory in territories:
-            has_dates = False
-            
-            for history_field in ['occupation_history', 'combat_history', 'status_history']:
-                if history_field in territory:
-                    for period in territory[history_field]:
-                        if 'document_date' in period:
-                            all_document_dates.add(period['document_date'])
-                            collection_records_with_dates += 1
-                            has_dates = True
-                        else:
-                            collection_records_without_dates += 1
-            
-            if has_dates:
-                collection_territories_with_dates += 1
-            else:
-                collection_territories_without_dates += 1
-        
-        territories_with_dates += collection_territories_with_dates
-        territories_without_dates += collection_territories_without_dates
-        status_records_with_dates += collection_records_with_dates
-        status_records_without_dates += collection_records_without_dates
-        
-        print(f"  Територій з датами документів: {collection_territories_with_dates}")
-        print(f"  Територій без дат документів: {collection_territories_without_dates}")
-        print(f"  Записів статусів з датами: {collection_records_with_dates}")
-        print(f"  Записів статусів без дат: {collection_records_without_dates}")
+        print(f"  Територій з датами документів: {counts['with_document_dates']}")
+        print(f"  Територій без дат документів: {counts['without_document_dates']}")
+        print(f"  Записів статусів з датами: {counts['records_with_dates']}")
+        print(f"  Записів статусів без дат: {counts['records_without_dates']}")
+    
+    all_document_dates = set(statistics['document_dates'])
+    territories_with_dates = statistics['totals']['with_document_dates']
+    territories_without_dates = statistics['totals']['without_document_dates']
+    status_records_with_dates = statistics['totals']['records_with_dates']
+    status_records_without_dates = statistics['totals']['records_without_dates']
     
     print(f"\n📈 ЗАГАЛЬНА СТАТИСТИКА:")
     print("-" * 40)
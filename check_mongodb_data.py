@@ -12,6 +12,8 @@ import sys
 from urllib.parse import quote_plus
 import os
 
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS
+
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 username = quote_plus("test")
 password = quote_plus("test")
@@ -100,6 +102,7 @@ def main():
     print("\n🔌 З'єднання з MongoDB закрито")
     print("=" * 60)
     print("🎉 Перевірка завершена!")
+    print("💡 Повна перевірка цілісності ієрархії та статусів: python3 audit_integrity.py")
 
 def check_database_structure():
     """Check the structure of territory data in MongoDB"""
@@ -108,34 +111,28 @@ def check_database_structure():
     
     try:
         client = MongoClient(MONGO_CONNECTION_STRING)
-        db = client.katottg
-        
-        # Check collections
-        collections = ['level1_regions', 'level2_raions', 'level3_hromadas', 'level4_settlements']
+        db = client[DATABASE_NAME]
         
-        for collection_name in collections:
+        for collection_name in LEVEL_COLLECTIONS:
             print(f"\n=== {collection_name.upper()} ===")
             collection = db[collection_name]
             count = collection.count_documents({})
             print(f"Кількість документів: {count}")
             
             if count > 0:
-                # Get sample documents
-                sample = list(collection.find({}, {'code': 1, 'name': 1, '_id': 0}).limit(3))
+                # Код об'єкта зберігається в _id
+                sample = list(collection.find({}, {'name': 1}).limit(3))
                 for i, item in enumerate(sample, 1):
-                    code = item.get('code', 'N/A')
+                    code = item['_id']
                     name = item.get('name', 'N/A')
                     print(f"  {i}. Code: {code} | Name: {name}")
-                    
-                    # Check code length
-                    if code != 'N/A':
-                        print(f"     Довжина коду: {len(code)} символів")
+                    print(f"     Довжина коду: {len(code)} символів")
         
-        # Check if there are any territories with the new status fields
+        # Території з історією статусів
         print(f"\n=== ПЕРЕВІРКА СТАТУСІВ ===")
-        for collection_name in collections:
-            collection = db[collection_name]
-            with_status = collection.count_documents({"status_periods": {"$exists": True, "$ne": []}})
+        history_filter = {"$or": [{field: {"$exists": True, "$ne": []}} for field in HISTORY_FIELDS]}
+        for collection_name in LEVEL_COLLECTIONS:
+            with_status = db[collection_name].count_documents(history_filter)
             print(f"{collection_name}: {with_status} територій зі статусами")
         
         client.close()
@@ -159,37 +156,31 @@ def check_specific_codes():
     
     try:
         client = MongoClient(MONGO_CONNECTION_STRING)
-        db = client.katottg
+        db = client[DATABASE_NAME]
         
-        collections = ['level1_regions', 'level2_raions', 'level3_hromadas', 'level4_settlements']
+        # Один запит $in на колекцію замість пошуку кожного коду окремо
+        found = {}
+        for collection_name in LEVEL_COLLECTIONS:
+            for result in db[collection_name].find({"_id": {"$in": test_codes}}, {"name": 1}):
+                found.setdefault(result['_id'], (collection_name, result.get('name', 'N/A')))
         
         for code in test_codes:
             print(f"\n🔍 Пошук коду: {code}")
-            found = False
-            
-            for collection_name in collections:
-                collection = db[collection_name]
-                result = collection.find_one({"code": code})
-                
-                if result:
-                    print(f"  ✅ Знайдено в {collection_name}")
-                    print(f"     Назва: {result.get('name', 'N/A')}")
-                    found = True
-                    break
             
-            if not found:
+            if code in found:
+                collection_name, name = found[code]
+                print(f"  ✅ Знайдено в {collection_name}")
+                print(f"     Назва: {name}")
+            else:
                 print(f"  ❌ Не знайдено в жодній колекції")
                 
-                # Try to find similar codes
+                # Коди з тим самим префіксом (перші 8 символів)
                 print(f"  🔍 Пошук подібних кодів...")
-                for collection_name in collections:
-                    collection = db[collection_name]
-                    # Search for codes that start with the same pattern
-                    pattern = code[:8]  # First 8 characters
-                    similar = list(collection.find({"code": {"$regex": f"^{pattern}"}}, 
-                                                  {"code": 1, "name": 1, "_id": 0}).limit(2))
+                for collection_name in LEVEL_COLLECTIONS:
+                    pattern = code[:8]
+                    similar = list(db[collection_name].find({"_id": {"$regex": f"^{pattern}"}}, {"_id": 1}).limit(2))
                     if similar:
-                        print(f"    {collection_name}: {[item['code'] for item in similar]}")
+                        print(f"    {collection_name}: {[item['_id'] for item in similar]}")
         
         client.close()
         
@@ -10,6 +10,13 @@ from pymongo import MongoClient
 from urllib.parse import quote_plus
 from datetime import datetime, timezone
 import json
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from status_periods import STATUS_PERIODS_COLLECTION, STATUS_CHANGED_FIELD, bump_data_version
+from status_propagation import LEVEL_COLLECTIONS
+from status_archive import STATUS_FIELDS, status_fields_filter, archive_status_data
 
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 username = quote_plus("test")
@@ -31,42 +38,28 @@ def connect_to_mongodb():
         print(f"❌ Помилка підключення до MongoDB: {e}")
         return None
 
-def clean_all_status_fields(client):
+def clean_collection(client, collection_name):
+    """
+    Видалення полів статусів у колекції одним update_many; позначка зміни
+    потрібна інкрементальному експорту, щоб очищені території потрапили у файл змін
+    Повертає (знайдено, оновлено)
+    """
+    result = client[DATABASE_NAME][collection_name].update_many(
+        status_fields_filter(),
+        {
+            "$unset": {field: "" for field in STATUS_FIELDS},
+            "$set": {STATUS_CHANGED_FIELD: datetime.now(timezone.utc)}
+        }
+    )
+    return result.matched_count, result.modified_count
+
+def clean_all_status_fields(client, parallel=False):
     """
-    Повне очищення всіх полів, пов'язаних зі статусами
+    Повне очищення всіх полів, пов'язаних зі статусами:
+    один update_many на колекцію (за бажанням - паралельно по колекціях)
     """
     db = client[DATABASE_NAME]
     
-    collections = [
-        'level1_regions',
-        'level2_raions', 
-        'level3_hromadas',
-        'level4_settlements',
-        'level_additional_city_districts'
-    ]
-    
-    # Поля для видалення
-    fields_to_remove = [
-        # Поточні статуси
-        "current_status",
-        "status_start_date", 
-        "status_end_date",
-        "last_status_update",
-        
-        # Окупація
-        "current_occupation_status",
-        "occupation_start_date",
-        "occupation_end_date", 
-        "last_occupation_update",
-        "occupation_history",
-        
-        # Бойові дії
-        "combat_history",
-        
-        # Загальна історія статусів
-        "status_history"
-    ]
-    
     total_processed = 0
     total_updated = 0
     total_errors = 0
@@ -74,123 +67,80 @@ def clean_all_status_fields(client):
     print("\n🧹 ПОЧИНАЮ ПОВНЕ ОЧИЩЕННЯ ВСІХ СТАТУСІВ...")
     print("-" * 60)
     print("🗑️  Видаляю наступні поля:")
-    for field in fields_to_remove:
+    for field in STATUS_FIELDS:
         print(f"   • {field}")
     print("-" * 60)
     
-    for collection_name in collections:
-        print(f"\n📊 Обробляю колекцію: {collection_name}")
-        
-        collection = db[collection_name]
-        
-        # Знаходимо всі території, які мають хоча б одне поле статусу
-        territories = collection.find({
-            "$or": [
-                {"current_status": {"$exists": True}},
-                {"status_start_date": {"$exists": True}},
-                {"status_end_date": {"$exists": True}},
-                {"last_status_update": {"$exists": True}},
-                {"current_occupation_status": {"$exists": True}},
-                {"occupation_start_date": {"$exists": True}},
-                {"occupation_end_date": {"$exists": True}},
-                {"last_occupation_update": {"$exists": True}},
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        collection_processed = 0
-        collection_updated = 0
-        collection_errors = 0
-        
-        for territory in territories:
-            total_processed += 1
-            collection_processed += 1
-            
-            try:
-                # Підготовуємо дані для видалення
-                unset_data = {}
-                for field in fields_to_remove:
-                    if field in territory:
-                        unset_data[field] = ""
-                
-                if unset_data:
-                    # Виконуємо видалення полів
-                    result = collection.update_one(
-                        {"_id": territory["_id"]}, 
-                        {"$unset": unset_data}
-                    )
-                    
-                    if result.modified_count > 0:
-                        total_updated += 1
-                        collection_updated += 1
-                        print(f"  ✅ {territory['name']}: видалено {len(unset_data)} полів")
-                    else:
-                        print(f"  ⚠️  {territory['name']}: немає змін")
-                else:
-                    print(f"  ℹ️  {territory['name']}: немає полів для видалення")
-                
-            except Exception as e:
-                print(f"  ❌ Помилка обробки {territory.get('name', 'Невідома територія')}: {e}")
-                total_errors += 1
-                collection_errors += 1
+    started = time.perf_counter()
+    
+    def clean_safely(collection_name):
+        try:
+            return clean_collection(client, collection_name)
+        except Exception as e:
+            return e
+    
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(LEVEL_COLLECTIONS)) as executor:
+            outcomes = dict(zip(LEVEL_COLLECTIONS, executor.map(clean_safely, LEVEL_COLLECTIONS)))
+    else:
+        outcomes = {collection_name: clean_safely(collection_name) for collection_name in LEVEL_COLLECTIONS}
+    
+    for collection_name, outcome in outcomes.items():
+        if isinstance(outcome, Exception):
+            print(f"  ❌ {collection_name}: помилка очищення: {outcome}")
+            total_errors += 1
+            continue
         
-        print(f"  📊 {collection_name}: оброблено {collection_processed}, оновлено {collection_updated}, помилок {collection_errors}")
+        processed, updated = outcome
+        total_processed += processed
+        total_updated += updated
+        print(f"  📊 {collection_name}: знайдено {processed}, оновлено {updated}")
+    
+    # Пласка колекція періодів дублює історії, тому очищується разом з ними
+    removed_periods = db[STATUS_PERIODS_COLLECTION].delete_many({}).deleted_count
+    print(f"\n🗂️  {STATUS_PERIODS_COLLECTION}: видалено {removed_periods} періодів")
+    bump_data_version(client, 'clean_all_statuses')
     
     print(f"\n🎯 ПІДСУМКИ ОЧИЩЕННЯ:")
     print(f"  Загалом оброблено: {total_processed}")
     print(f"  Оновлено: {total_updated}")
     print(f"  Помилок: {total_errors}")
+    print(f"  Час: {time.perf_counter() - started:.1f} с")
     
     return total_processed, total_updated, total_errors
 
 def verify_cleanup(client):
     """
-    Перевірка, що всі поля статусів були видалені
+    Перевірка, що всі поля статусів були видалені:
+    одна агрегація з підрахунком залишків по всіх колекціях
     """
     db = client[DATABASE_NAME]
     
-    collections = [
-        'level1_regions',
-        'level2_raions', 
-        'level3_hromadas',
-        'level4_settlements',
-        'level_additional_city_districts'
-    ]
-    
     print("\n🔍 ПЕРЕВІРКА ОЧИЩЕННЯ:")
     print("-" * 40)
     
-    fields_to_check = [
-        "current_status",
-        "status_start_date", 
-        "status_end_date",
-        "last_status_update",
-        "current_occupation_status",
-        "occupation_start_date",
-        "occupation_end_date", 
-        "last_occupation_update",
-        "occupation_history",
-        "combat_history",
-        "status_history"
+    def remaining_stages(collection_name):
+        return [
+            {"$match": status_fields_filter()},
+            {"$project": {"_id": 0, "collection": {"$literal": collection_name}}}
+        ]
+    
+    pipeline = remaining_stages(LEVEL_COLLECTIONS[0])
+    pipeline += [
+        {"$unionWith": {"coll": collection_name, "pipeline": remaining_stages(collection_name)}}
+        for collection_name in LEVEL_COLLECTIONS[1:]
     ]
+    pipeline.append({"$group": {"_id": "$collection", "count": {"$sum": 1}}})
     
-    total_remaining = 0
+    remaining = {group['_id']: group['count'] for group in db[LEVEL_COLLECTIONS[0]].aggregate(pipeline)}
     
-    for collection_name in collections:
-        collection = db[collection_name]
-        
-        # Перевіряємо кожне поле
-        for field in fields_to_check:
-            count = collection.count_documents({field: {"$exists": True}})
-            if count > 0:
-                print(f"  ⚠️  {collection_name}.{field}: {count} записів")
-                total_remaining += count
-        
-        if total_remaining == 0:
+    for collection_name in LEVEL_COLLECTIONS:
+        if remaining.get(collection_name):
+            print(f"  ⚠️  {collection_name}: {remaining[collection_name]} територій з полями статусів")
+        else:
             print(f"  ✅ {collection_name}: всі поля статусів видалені")
     
+    total_remaining = sum(remaining.values())
     if total_remaining == 0:
         print("\n✅ ВСІ ПОЛЯ СТАТУСІВ УСПІШНО ВИДАЛЕНІ!")
     else:
@@ -228,6 +178,11 @@ def show_collection_statistics(client):
 
 def main():
     """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Повне очищення статусів територій")
+    arg_parser.add_argument('--parallel', action='store_true', help="Очищувати колекції паралельно")
+    arg_parser.add_argument('--no-archive', action='store_true', help="Не архівувати дані статусів перед очищенням")
+    args = arg_parser.parse_args()
+    
     print("🗑️  СКРИПТ ПОВНОГО ОЧИЩЕННЯ СТАТУСІВ")
     print("=" * 60)
     print("⚠️  УВАГА: Цей скрипт видалить ВСІ поля, пов'язані зі статусами!")
@@ -246,8 +201,12 @@ def main():
         return
     
     try:
+        # Знімок даних статусів, з якого їх можна відновити (python3 status_archive.py --restore)
+        if not args.no_archive:
+            archive_status_data(client, 'clean_all_statuses')
+        
         # Очищуємо всі поля статусів
-        processed, updated, errors = clean_all_status_fields(client)
+        processed, updated, errors = clean_all_status_fields(client, parallel=args.parallel)
         
         if errors == 0:
             print("\n✅ Очищення завершено успішно!")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Порівняння двох редакцій документа Перелік без звернення до бази даних
+Показує додані, вилучені території та території зі зміненими датами статусу
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from import_perelik_data_enhanced import parse_docx_tables_improved, normalize_table_dates, CODE_IDX, NAME_IDX
+
+CHANGE_ADDED = 'added'
+CHANGE_REMOVED = 'removed'
+CHANGE_DATES = 'date_changed'
+
+def load_edition(filename):
+    """
+    Парсинг редакції документа та нормалізація дат
+    """
+    tables_data = parse_docx_tables_improved(filename, verbose=False)
+    if not tables_data:
+        raise ValueError(f"Не вдалося отримати дані з документа {filename}")
+
+    date_errors = normalize_table_dates(tables_data)
+    return tables_data, date_errors
+
+def index_edition(tables_data):
+    """
+    Хеш-індекс редакції: (код території, статус) -> назва, таблиці та періоди
+    """
+    index = {}
+
+    for table_data in tables_data:
+        for row_data, periods in zip(table_data['valid_rows'], table_data['row_periods']):
+            key = (row_data[CODE_IDX].strip(), table_data['status'])
+            entry = index.setdefault(key, {
+                'name': row_data[NAME_IDX],
+                'tables': set(),
+                'periods': set()
+            })
+            entry['tables'].add(table_data['table_index'])
+            entry['periods'].update(periods)
+
+    return index
+
+def compare_editions(old_tables, new_tables):
+    """
+    Порівняння двох розібраних редакцій за ключем (код території, статус)
+    Повертає список змін, відсортований за типом зміни та кодом
+    """
+    old_index = index_edition(old_tables)
+    new_index = index_edition(new_tables)
+
+    changes = []
+
+    for key in new_index.keys() - old_index.keys():
+        changes.append(_change_record(CHANGE_ADDED, key, None, new_index[key]))
+
+    for key in old_index.keys() - new_index.keys():
+        changes.append(_change_record(CHANGE_REMOVED, key, old_index[key], None))
+
+    for key in old_index.keys() & new_index.keys():
+        if old_index[key]['periods'] != new_index[key]['periods']:
+            changes.append(_change_record(CHANGE_DATES, key, old_index[key], new_index[key]))
+
+    changes.sort(key=lambda change: (change['change_type'], change['territory_code'], change['status']))
+    return changes
+
+def _change_record(change_type, key, old_entry, new_entry):
+    """
+    Запис про зміну для звіту
+    """
+    territory_code, status = key
+    entry = new_entry or old_entry
+
+    return {
+        'change_type': change_type,
+        'territory_code': territory_code,
+        'territory_name': entry['name'],
+        'status': status,
+        'old_tables': sorted(old_entry['tables']) if old_entry else [],
+        'new_tables': sorted(new_entry['tables']) if new_entry else [],
+        'old_periods': _sorted_periods(old_entry['periods']) if old_entry else [],
+        'new_periods': _sorted_periods(new_entry['periods']) if new_entry else []
+    }
+
+def _sorted_periods(periods):
+    """
+    Періоди у хронологічному порядку (відкриті та без дат - в кінці)
+    """
+    return sorted(periods, key=lambda period: tuple((value is None, value or 0) for value in period))
+
+def format_periods(periods):
+    """
+    Текстове представлення періодів для CSV: ДД.ММ.РРРР-ДД.ММ.РРРР; ...
+    """
+    formatted = []
+    for start_date, end_date in periods:
+        start_str = start_date.strftime('%d.%m.%Y') if start_date else 'н/д'
+        end_str = end_date.strftime('%d.%m.%Y') if end_date else ''
+        formatted.append(f"{start_str}-{end_str}")
+    return '; '.join(formatted)
+
+def write_changes_csv(changes, output_file):
+    """
+    Збереження змін у CSV
+    """
+    fieldnames = ['change_type', 'territory_code', 'territory_name', 'status',
+                  'old_tables', 'new_tables', 'old_periods', 'new_periods']
+
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for change in changes:
+            writer.writerow({
+                **change,
+                'old_tables': ','.join(str(table) for table in change['old_tables']),
+                'new_tables': ','.join(str(table) for table in change['new_tables']),
+                'old_periods': format_periods(change['old_periods']),
+                'new_periods': format_periods(change['new_periods'])
+            })
+
+def write_changes_json(changes, output_file, summary):
+    """
+    Збереження змін у JSON (дати у форматі ISO)
+    """
+    def period_dicts(periods):
+        return [
+            {
+                'start_date': start_date.date().isoformat() if start_date else None,
+                'end_date': end_date.date().isoformat() if end_date else None
+            }
+            for start_date, end_date in periods
+        ]
+
+    payload = {
+        'summary': summary,
+        'changes': [
+            {**change, 'old_periods': period_dicts(change['old_periods']), 'new_periods': period_dicts(change['new_periods'])}
+            for change in changes
+        ]
+    }
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Порівняння двох редакцій документа Перелік")
+    arg_parser.add_argument('old_document', help="Попередня редакція (.docx)")
+    arg_parser.add_argument('new_document', help="Нова редакція (.docx)")
+    arg_parser.add_argument('-o', '--output', default='perelik_diff.csv',
+                            help="Файл результату (.csv або .json), за замовчуванням perelik_diff.csv")
+    args = arg_parser.parse_args()
+
+    print("🔀 ПОРІВНЯННЯ РЕДАКЦІЙ ПЕРЕЛІКУ")
+    print("=" * 60)
+    print(f"📄 Попередня редакція: {args.old_document}")
+    print(f"📄 Нова редакція: {args.new_document}")
+    print("=" * 60)
+
+    started = time.perf_counter()
+
+    try:
+        # Документи незалежні, тому розбираємо їх паралельно в окремих процесах
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            old_future = executor.submit(load_edition, args.old_document)
+            new_future = executor.submit(load_edition, args.new_document)
+            old_tables, old_date_errors = old_future.result()
+            new_tables, new_date_errors = new_future.result()
+    except Exception as e:
+        print(f"❌ Помилка парсингу: {e}")
+        sys.exit(1)
+
+    changes = compare_editions(old_tables, new_tables)
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        'old_document': args.old_document,
+        'new_document': args.new_document,
+        CHANGE_ADDED: sum(1 for change in changes if change['change_type'] == CHANGE_ADDED),
+        CHANGE_REMOVED: sum(1 for change in changes if change['change_type'] == CHANGE_REMOVED),
+        CHANGE_DATES: sum(1 for change in changes if change['change_type'] == CHANGE_DATES),
+        'old_date_errors': len(old_date_errors),
+        'new_date_errors': len(new_date_errors)
+    }
+
+    if args.output.lower().endswith('.json'):
+        write_changes_json(changes, args.output, summary)
+    else:
+        write_changes_csv(changes, args.output)
+
+    print(f"\n📊 ПІДСУМКИ ПОРІВНЯННЯ:")
+    print(f"  ➕ Додано: {summary[CHANGE_ADDED]}")
+    print(f"  ➖ Вилучено: {summary[CHANGE_REMOVED]}")
+    print(f"  📅 Змінено дати: {summary[CHANGE_DATES]}")
+    print(f"  ⏱️  Час: {elapsed:.2f} с")
+    print(f"\n📄 Результат збережено в {args.output}")
+
+if __name__ == "__main__":
+    main()
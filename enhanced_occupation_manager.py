@@ -7,17 +7,26 @@
 Дата: 2025
 """
 
-import pandas as pd
 import pymongo
 from pymongo import MongoClient
 import sys
 import os
 from urllib.parse import quote_plus
 from dateutil import parser
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 import json
 from enum import Enum
 
+from status_periods import has_status_periods, get_status_periods_on_date, rebuild_status_periods
+from status_propagation import propagate_status_to_descendants
+from status_engine import get_status_engine, get_status_on_date_from_engine, get_status_delta_from_engine
+from status_bulk_lookup import bulk_status_lookup
+from status_cache import cached_status_query, print_cache_stats
+from status_current import recompute_current_status
+from status_rollups import get_oblast_rollups, print_rollups, build_status_rollups
+from status_export import export_status_csv
+from status_statistics import get_status_statistics
+
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 username = quote_plus("test")
 password = quote_plus("test")
@@ -34,6 +43,12 @@ DOCUMENT_CONFIG = {
     'document_description': 'Документ Перелік 07052025 від 7 травня 2025 року'
 }
 
+# Бекенд запитів "статус на дату":
+# 'engine' - рушій у пам'яті (NumPy), 'database' - індексована колекція status_periods
+STATUS_QUERY_CONFIG = {
+    'backend': 'engine'
+}
+
 class TerritoryStatus(Enum):
     """Статуси територій згідно з документом Перелік 07052025"""
     POSSIBLE_COMBAT = "1. Території можливих бойових дій"
@@ -86,9 +101,32 @@ def connect_to_mongodb():
         print(f"❌ Помилка підключення до MongoDB: {e}")
         sys.exit(1)
 
-def get_territory_status_on_date(client, query_date, status_type=None):
+def get_territory_status_on_date(client, query_date, status_type=None, backend=None):
     """
     Отримання статусу території на конкретну дату з підтримкою нових статусів
+    Запит виконується рушієм у пам'яті або по індексованій пласкій колекції
+    status_periods (див. STATUS_QUERY_CONFIG); якщо колекція ще не побудована -
+    по вкладених історіях колекцій рівнів
+    Повторні запити з тими ж бекендом, датою та статусом обслуговуються з кешу,
+    доки не зміниться версія даних статусів
+    """
+    backend = backend or STATUS_QUERY_CONFIG['backend']
+    if not has_status_periods(client):
+        backend = 'history'
+    status_value = status_type.value if status_type else None
+    
+    def compute():
+        if backend == 'engine':
+            return get_status_on_date_from_engine(client, query_date, status_value)
+        if backend == 'history':
+            return get_territory_status_on_date_from_history(client, query_date, status_type)
+        return get_status_periods_on_date(client, query_date, status_value)
+    
+    return cached_status_query(client, query_date, status_value, compute, backend)
+
+def get_territory_status_on_date_from_history(client, query_date, status_type=None):
+    """
+    Статус на дату через агрегацію вкладених історій (без індексу)
     """
     db = client[DATABASE_NAME]
     
@@ -188,10 +226,41 @@ def get_territory_status_on_date(client, query_date, status_type=None):
     
     return territories_with_status
 
+def get_territory_status_delta(client, first_date, second_date, status_type=None):
+    """
+    Території, що отримали, втратили або змінили статус між двома датами
+    Обчислюється рушієм статусів за один прохід, без побудови двох повних списків
+    """
+    if not has_status_periods(client):
+        print("⚠️  Колекція status_periods ще не побудована (запустіть status_periods.py)")
+        return {'entered': [], 'exited': [], 'changed': []}
+    
+    return get_status_delta_from_engine(client, first_date, second_date, status_type.value if status_type else None)
+
+def get_territory_status_bulk(client, codes, dates, include_inherited=True):
+    """
+    Статуси для пакета пар (код території, дата) одним векторним проходом
+    Успадковані від області/району/громади статуси враховуються за замовчуванням
+    Повертає DataFrame у порядку вхідних пар
+    """
+    return bulk_status_lookup(get_status_engine(client), codes, dates, include_inherited)
+
+def refresh_status_data(client, codes):
+    """
+    Оновлення похідних даних після зміни історій територій (як після імпорту Переліку):
+    успадковані статуси, пласка колекція періодів, поточні статуси та зведення
+    """
+    _, propagated_codes = propagate_status_to_descendants(client)
+    rebuild_status_periods(client)
+    recompute_current_status(client, set(codes) | propagated_codes)
+    build_status_rollups(client)
+
 def add_territory_status_period(client, territory_name, status, start_date, end_date=None, 
-                               source_document="Перелік 07052025", additional_data=None):
+                               source_document="Перелік 07052025", additional_data=None, refresh=True):
     """
     Додавання нового періоду статусу для території з підтримкою нових статусів
+    refresh=False - похідні дані оновлює викликач (один раз на весь імпорт)
+    Повертає код території або None, якщо територію не знайдено
     """
     db = client[DATABASE_NAME]
     
@@ -200,7 +269,7 @@ def add_territory_status_period(client, territory_name, status, start_date, end_
     
     if not territory_doc:
         print(f"❌ Територію '{territory_name}' не знайдено")
-        return False
+        return None
     
     collection = db[collection_name]
     
@@ -240,21 +309,18 @@ def add_territory_status_period(client, territory_name, status, start_date, end_
     update_data = {
         "$set": {
             history_field: history,
-            "current_status": status.value if isinstance(status, TerritoryStatus) else status,
-            "last_status_update": datetime.now()
+            "last_status_update": datetime.now(timezone.utc)
         }
     }
     
-    if start_date:
-        update_data["$set"]["status_start_date"] = start_date
-    
-    if end_date:
-        update_data["$set"]["status_end_date"] = end_date
-    
     collection.update_one({"_id": territory_doc["_id"]}, update_data)
     
+    # Поточний статус - той, що активний зараз, а не щойно доданий
+    if refresh:
+        refresh_status_data(client, [territory_doc["_id"]])
+    
     print(f"✅ Додано період статусу '{status.value if isinstance(status, TerritoryStatus) else status}' для: {territory_doc['name']}")
-    return True
+    return territory_doc["_id"]
 
 def find_territory(client, territory_name):
     """
@@ -292,6 +358,7 @@ def import_from_perelik_document(client, document_data):
     
     imported_count = 0
     errors_count = 0
+    imported_codes = set()
     
     for table_data in document_data.get('tables', []):
         table_index = table_data.get('table_index')
@@ -357,7 +424,7 @@ def import_from_perelik_document(client, document_data):
             
             # Додаємо запис
             try:
-                success = add_territory_status_period(
+                added_code = add_territory_status_period(
                     client, 
                     territory_name, 
                     status, 
@@ -367,11 +434,13 @@ def import_from_perelik_document(client, document_data):
                     additional_data={
                         'territory_code': territory_code,
                         'table_source': table_index
-                    }
+                    },
+                    refresh=False
                 )
                 
-                if success:
+                if added_code:
                     imported_count += 1
+                    imported_codes.add(added_code)
                 else:
                     errors_count += 1
                     
@@ -379,6 +448,10 @@ def import_from_perelik_document(client, document_data):
                 print(f"❌ Помилка додавання запису для {territory_name}: {e}")
                 errors_count += 1
     
+    # Похідні дані оновлюються один раз на весь імпорт
+    if imported_codes:
+        refresh_status_data(client, imported_codes)
+    
     print(f"\n✅ Імпорт завершено!")
     print(f"📊 Успішно імпортовано: {imported_count}")
     print(f"❌ Помилок: {errors_count}")
@@ -386,164 +459,45 @@ def import_from_perelik_document(client, document_data):
 def export_enhanced_data_to_csv(client, output_file="enhanced_territory_data.csv"):
     """
     Експорт розширених даних про статуси територій в CSV файл
+    (потоковий запис, див. status_export)
     """
-    db = client[DATABASE_NAME]
-    
-    collections = [
-        'level1_regions',
-        'level2_raions', 
-        'level3_hromadas',
-        'level4_settlements',
-        'level_additional_city_districts'
-    ]
-    
-    all_data = []
-    
-    for collection_name in collections:
-        collection = db[collection_name]
-        
-        # Знаходимо всі території з історією
-        territories = collection.find({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        for territory in territories:
-            # Обробляємо історію окупації
-            if 'occupation_history' in territory:
-                for period in territory['occupation_history']:
-                    all_data.append({
-                        'territory_name': territory['name'],
-                        'territory_code': territory.get('code', ''),
-                        'category': territory.get('category', ''),
-                        'collection': collection_name,
-                        'status': period['status'],
-                        'start_date': period['start_date'].strftime('%d.%m.%Y') if period['start_date'] else '',
-                        'end_date': period['end_date'].strftime('%d.%m.%Y') if period['end_date'] else '',
-                        'source_document': period.get('source_document', ''),
-                        'updated_at': period['updated_at'].strftime('%d.%m.%Y %H:%M:%S') if 'updated_at' in period else ''
-                    })
-            
-            # Обробляємо історію бойових дій
-            if 'combat_history' in territory:
-                for period in territory['combat_history']:
-                    all_data.append({
-                        'territory_name': territory['name'],
-                        'territory_code': territory.get('code', ''),
-                        'category': territory.get('category', ''),
-                        'collection': collection_name,
-                        'status': period['status'],
-                        'start_date': period['start_date'].strftime('%d.%m.%Y') if period['start_date'] else '',
-                        'end_date': period['end_date'].strftime('%d.%m.%Y') if period['end_date'] else '',
-                        'source_document': period.get('source_document', ''),
-                        'updated_at': period['updated_at'].strftime('%d.%m.%Y %H:%M:%S') if 'updated_at' in period else ''
-                    })
-            
-            # Обробляємо загальну історію статусів
-            if 'status_history' in territory:
-                for period in territory['status_history']:
-                    all_data.append({
-                        'territory_name': territory['name'],
-                        'territory_code': territory.get('code', ''),
-                        'category': territory.get('category', ''),
-                        'collection': collection_name,
-                        'status': period['status'],
-                        'start_date': period['start_date'].strftime('%d.%m.%Y') if period['start_date'] else '',
-                        'end_date': period['end_date'].strftime('%d.%m.%Y') if period['end_date'] else '',
-                        'source_document': period.get('source_document', ''),
-                        'updated_at': period['updated_at'].strftime('%d.%m.%Y %H:%M:%S') if 'updated_at' in period else ''
-                    })
-    
-    if all_data:
-        df = pd.DataFrame(all_data)
-        df.to_csv(output_file, index=False, encoding='utf-8')
-        print(f"✅ Експортовано {len(all_data)} записів в {output_file}")
-    else:
-        print("❌ Немає даних для експорту")
+    return export_status_csv(client, output_file)
 
 def show_enhanced_statistics(client):
     """
     Показ розширеної статистики з підтримкою нових статусів
+    (одна агрегація на сервері, див. status_statistics)
     """
-    db = client[DATABASE_NAME]
-    
-    collections = [
-        'level1_regions',
-        'level2_raions', 
-        'level3_hromadas',
-        'level4_settlements',
-        'level_additional_city_districts'
-    ]
-    
-    total_territories = 0
-    territories_with_history = 0
-    status_counts = {}
-    document_dates = set()
-    
     print("\n📈 РОЗШИРЕНА СТАТИСТИКА СТАТУСІВ ТЕРИТОРІЙ:")
     print("-" * 50)
     print(f"📄 Документ: {DOCUMENT_CONFIG['document_name']}")
     print(f"📅 Дата документа: {DOCUMENT_CONFIG['document_date']}")
     print("-" * 50)
     
-    for collection_name in collections:
-        collection = db[collection_name]
-        
-        # Загальна кількість територій
-        total_in_collection = collection.count_documents({})
-        total_territories += total_in_collection
-        
-        # Території з історією
-        with_history = collection.count_documents({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        territories_with_history += with_history
-        
+    statistics = get_status_statistics(client)
+    
+    for collection_name, counts in statistics['collections'].items():
         print(f"\n{collection_name}:")
-        print(f"  Загалом територій: {total_in_collection}")
-        print(f"  З історією статусів: {with_history}")
-        
-        # Підрахунок по статусах та збір дат документів
-        territories = collection.find({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        for territory in territories:
-            for history_field in ['occupation_history', 'combat_history', 'status_history']:
-                if history_field in territory:
-                    for period in territory[history_field]:
-                        status = period.get('status', 'Невідомий')
-                        if status not in status_counts:
-                            status_counts[status] = 0
-                        status_counts[status] += 1
-                        
-                        # Збираємо дати документів
-                        if 'document_date' in period:
-                            document_dates.add(period['document_date'])
+        print(f"  Загалом територій: {counts['territories']}")
+        print(f"  З історією статусів: {counts['with_history']}")
     
     print(f"\n📊 ЗАГАЛЬНА СТАТИСТИКА:")
-    print(f"  Загалом територій: {total_territories}")
-    print(f"  З історією статусів: {territories_with_history}")
+    print(f"  Загалом територій: {statistics['totals']['territories']}")
+    print(f"  З історією статусів: {statistics['totals']['with_history']}")
     
-    if document_dates:
+    if statistics['document_dates']:
         print(f"\n📅 ДАТИ ДОКУМЕНТІВ У БАЗІ:")
-        for doc_date in sorted(document_dates):
+        for doc_date in statistics['document_dates']:
             print(f"  • {doc_date}")
     
     print(f"\n📋 РОЗПОДІЛ ПО СТАТУСАХ:")
-    for status, count in sorted(status_counts.items()):
+    for status, count in sorted(statistics['status_counts'].items()):
         print(f"  {status}: {count}")
+    
+    # Покриття статусами по областях на сьогодні з готових зведень
+    if has_status_periods(client):
+        print(f"\n🧾 ПОКРИТТЯ СТАТУСАМИ ПО ОБЛАСТЯХ НА {datetime.now().strftime('%d.%m.%Y')}:")
+        print_rollups(get_oblast_rollups(client))
 
 def show_enhanced_menu():
     """Показ розширеного головного меню"""
@@ -560,6 +514,7 @@ def show_enhanced_menu():
     print("5. 📊 Експорт даних в CSV")
     print("6. 📈 Розширена статистика")
     print("7. 🔧 Налаштування статусів")
+    print("8. 🔀 Зміни статусів між двома датами")
     print("0. 🚪 Вихід")
     print("=" * 60)
 
@@ -573,6 +528,8 @@ def show_status_settings():
         print(f"   Дата початку: {config['start_date_column']}")
         print(f"   Дата кінця: {config['end_date_column']}")
         print()
+    print(f"Бекенд запитів статусу на дату: {STATUS_QUERY_CONFIG['backend']}")
+    print_cache_stats()
 
 def main():
     """Головна функція"""
@@ -586,7 +543,7 @@ def main():
         show_enhanced_menu()
         
         try:
-            choice = input("Виберіть опцію (0-7): ").strip()
+            choice = input("Виберіть опцію (0-8): ").strip()
             
             if choice == "0":
                 print("👋 До побачення!")
@@ -697,6 +654,44 @@ def main():
             elif choice == "7":
                 show_status_settings()
                 
+            elif choice == "8":
+                first_date_str = input("Введіть першу дату (формат: ДД.ММ.РРРР): ").strip()
+                second_date_str = input("Введіть другу дату (формат: ДД.ММ.РРРР): ").strip()
+                status_filter = input("Введіть статус для фільтрації (або Enter для всіх): ").strip()
+                
+                try:
+                    first_date = parser.parse(first_date_str, dayfirst=True)
+                    second_date = parser.parse(second_date_str, dayfirst=True)
+                    status_type = None
+                    
+                    if status_filter:
+                        for status in TerritoryStatus:
+                            if status.value == status_filter:
+                                status_type = status
+                                break
+                    
+                    delta = get_territory_status_delta(client, first_date, second_date, status_type)
+                    
+                    print(f"\n🔀 Зміни статусів з {first_date.strftime('%d.%m.%Y')} по {second_date.strftime('%d.%m.%Y')}:")
+                    titles = {
+                        'entered': "➕ Отримали статус",
+                        'exited': "➖ Втратили статус",
+                        'changed': "🔄 Змінили статус"
+                    }
+                    for kind, title in titles.items():
+                        print(f"\n  {title}: {len(delta[kind])}")
+                        for territory in delta[kind]:
+                            before = ', '.join(territory['statuses_before']) or '—'
+                            after = ', '.join(territory['statuses_after']) or '—'
+                            print(f"  • {territory['name']} ({territory['category']}): {before} → {after}")
+                            for period in territory['driving_periods']:
+                                start_str = period['start_date'].strftime('%d.%m.%Y') if period['start_date'] else 'н/д'
+                                end_str = period['end_date'].strftime('%d.%m.%Y') if period['end_date'] else 'н/д'
+                                print(f"    Період: {period['status']} ({start_str} - {end_str})")
+                        
+                except Exception as e:
+                    print(f"❌ Помилка: {e}")
+                
             else:
                 print("❌ Невірний вибір. Спробуйте ще раз.")
                 
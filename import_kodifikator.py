@@ -11,8 +11,12 @@ import pymongo
 from pymongo import MongoClient
 import sys
 import os
+import csv
+import json
 from urllib.parse import quote_plus
 
+from status_periods import bump_data_version
+
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 # Замініть цей рядок на свій рядок підключення з MongoDB Atlas
 # Використовуємо quote_plus для правильного кодування логіна та пароля
@@ -35,6 +39,18 @@ CATEGORY_TO_COLLECTION = {
     'B': 'level_additional_city_districts'  # Міські райони
 }
 
+# Файл класифікатора та його скомпільований знімок для офлайн-перевірок
+CSV_FILENAME = 'kodifikator-16-05-2025.csv'
+CLASSIFIER_SNAPSHOT_FILENAME = 'kodifikator_snapshot.json'
+
+LEVEL_COLUMNS = [
+    'Перший рівень',
+    'Другий рівень', 
+    'Третій рівень',
+    'Четвертий рівень',
+    'Додатковий рівень'
+]
+
 def connect_to_mongodb():
     """Підключення до MongoDB Atlas"""
     try:
@@ -103,6 +119,66 @@ def determine_object_code_and_parent(row):
     
     return object_code, parent_code
 
+def build_classifier_index(csv_path=CSV_FILENAME):
+    """
+    Побудова індексу класифікатора з CSV без звернення до бази:
+    код -> {name, category, parent_code, collection}
+    """
+    index = {}
+    
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        for parts in reader:
+            # Пропускаємо заголовки та метадані
+            if len(parts) < 7 or not parts[0].startswith('UA'):
+                continue
+            
+            category = parts[5].strip()
+            if category not in CATEGORY_TO_COLLECTION:
+                continue
+            
+            row = {level: parts[i].strip() for i, level in enumerate(LEVEL_COLUMNS)}
+            object_code, parent_code = determine_object_code_and_parent(row)
+            if not object_code:
+                continue
+            
+            index[object_code] = {
+                'name': parts[6].strip(),
+                'category': category,
+                'parent_code': parent_code,
+                'collection': CATEGORY_TO_COLLECTION[category]
+            }
+    
+    return index
+
+def load_classifier_index(csv_path=CSV_FILENAME, snapshot_path=CLASSIFIER_SNAPSHOT_FILENAME):
+    """
+    Завантаження індексу класифікатора зі знімка; знімок перебудовується,
+    якщо його немає або CSV-файл новіший
+    """
+    csv_mtime = os.path.getmtime(csv_path)
+    
+    if snapshot_path and os.path.exists(snapshot_path):
+        try:
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('source') == os.path.basename(csv_path) and snapshot.get('source_mtime') == csv_mtime:
+                return snapshot['territories']
+        except (ValueError, KeyError) as e:
+            print(f"⚠️  Знімок класифікатора пошкоджено, перебудовую: {e}")
+    
+    index = build_classifier_index(csv_path)
+    
+    if snapshot_path:
+        with open(snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'source': os.path.basename(csv_path),
+                'source_mtime': csv_mtime,
+                'territories': index
+            }, f, ensure_ascii=False)
+    
+    return index
+
 def import_data_to_mongodb(client, df):
     """Імпорт даних в MongoDB"""
     db = client[DATABASE_NAME]
@@ -195,6 +271,9 @@ def main():
     # Імпортуємо дані
     import_data_to_mongodb(client, df)
     
+    # Назви та категорії могли змінитись - кешовані результати застаріли
+    bump_data_version(client, 'import_kodifikator')
+    
     # Закриваємо з'єднання
     client.close()
     print("\n🔌 З'єднання з MongoDB закрито")
@@ -6,17 +6,25 @@
 """
 
 import docx
+from docx.oxml.ns import qn
 import pymongo
 from pymongo import MongoClient
 from urllib.parse import quote_plus
-from dateutil import parser
 from datetime import datetime, timezone
 import json
 import sys
 import re
 from enum import Enum
+from functools import lru_cache
 import hashlib
 
+from import_kodifikator import load_classifier_index
+from status_propagation import propagate_status_to_descendants
+from status_periods import rebuild_status_periods, STATUS_PERIODS_COLLECTION
+from status_current import recompute_current_status
+from status_rollups import build_status_rollups
+from status_statistics import get_status_statistics
+
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 username = quote_plus("test")
 password = quote_plus("test")
@@ -34,6 +42,12 @@ IMPORT_CONFIG = {
     'import_description': 'Перший імпорт даних з документа Перелік 07052025 від 7 травня 2025 року'
 }
 
+# Параметри офлайн-перевірки документа перед імпортом
+PREFLIGHT_CONFIG = {
+    'max_not_found_ratio': 0.02,  # Частка кодів, відсутніх у класифікаторі, після якої імпорт зупиняється
+    'report_file': 'preflight_report.json'
+}
+
 class TerritoryStatus(Enum):
     """Статуси територій згідно з документом Перелік 07052025"""
     POSSIBLE_COMBAT = "1. Території можливих бойових дій"
@@ -114,150 +128,387 @@ def finalize_import_session(client, import_id, final_stats):
     
     print(f"✅ Сесія імпорту {import_id} завершена")
 
-def is_header_row(row_data):
+# Конфігурація дата-колонок для кожного статусу (як у enhanced_occupation_manager.py)
+STATUS_DATE_CONFIG = {
+    TerritoryStatus.POSSIBLE_COMBAT: {
+        'start_date_column': 'Дата виникнення можливості бойових дій',
+        'end_date_column': 'Дата припинення можливості бойових дій*'
+    },
+    TerritoryStatus.ACTIVE_COMBAT: {
+        'start_date_column': 'Дата початку бойових дій',
+        'end_date_column': 'Дата завершення бойових дій*'
+    },
+    TerritoryStatus.ACTIVE_COMBAT_WITH_RESOURCES: {
+        'start_date_column': 'Дата початку бойових дій',
+        'end_date_column': 'Дата завершення бойових дій*'
+    },
+    TerritoryStatus.TEMPORARILY_OCCUPIED: {
+        'start_date_column': 'Дата початку тимчасової окупації',
+        'end_date_column': 'Дата завершення тимчасової окупації*'
+    }
+}
+
+CODE_COLUMN_HEADER = 'Код'
+NAME_COLUMN_HEADER = 'Найменування'
+
+# Канонічний порядок колонок у valid_rows незалежно від порядку колонок у документі
+CODE_IDX, NAME_IDX, START_DATE_IDX, END_DATE_IDX = range(4)
+
+# Типи рядків таблиці
+ROW_TERRITORY = 'territory'
+ROW_OBLAST = 'oblast'
+ROW_RAION = 'raion'
+ROW_COLUMN_HEADER = 'column_header'
+ROW_MALFORMED_CODE = 'malformed_code'
+ROW_OTHER = 'other'
+
+TERRITORY_CODE_PATTERN = re.compile(r'^UA\d{17}$')
+MALFORMED_CODE_PATTERN = re.compile(r'^UA[\s\d]+$', re.IGNORECASE)
+# 1.1. ДНІПРОПЕТРОВСЬКА ОБЛАСТЬ, 1. АВТОНОМНА РЕСПУБЛІКА КРИМ, 12. М. СЕВАСТОПОЛЬ
+OBLAST_SECTION_PATTERN = re.compile(r'^(\d+)\.(?:(\d+)\.)?\s*(\S.*)$')
+# Криворізький район
+RAION_SECTION_PATTERN = re.compile(r'\bрайон$', re.IGNORECASE)
+# Повтор заголовка колонок на новій сторінці
+COLUMN_HEADER_PATTERN = re.compile(r'^(Код|Найменування|Дата\s+)', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def normalize_header(text):
     """
-    Перевіряє, чи є рядок заголовком області/району
+    Нормалізація заголовка для порівняння (переноси, nbsp, зірочки, регістр)
     """
-    if not row_data or len(row_data) < 2:
-        return True
+    return WHITESPACE_PATTERN.sub(' ', text.replace('*', '')).strip().lower()
+
+def classify_row(row_data, code_idx=CODE_IDX):
+    """
+    Визначає тип рядка таблиці: територія, розділ області/району,
+    повтор заголовка колонок, рядок з пошкодженим кодом або інше
+    """
+    if not row_data:
+        return ROW_OTHER
     
-    # Перевіряємо перші дві колонки
-    first_col = row_data[0].strip() if row_data[0] else ""
-    second_col = row_data[1].strip() if len(row_data) > 1 and row_data[1] else ""
+    first_col = row_data[code_idx] if len(row_data) > code_idx else ''
     
-    # Заголовки областей/районів
-    header_patterns = [
-        r'^\d+\.\d*\.\s*[А-ЯІЇЄ\s]+ОБЛАСТЬ$',  # 1.1. ДНІПРОПЕТРОВСЬКА ОБЛАСТЬ
-        r'^\d+\.\s*[А-ЯІЇЄ\s]+ОБЛАСТЬ$',       # 1. ДНІПРОПЕТРОВСЬКА ОБЛАСТЬ
-        r'^\d+\.\s*АВТОНОМНА\s+РЕСПУБЛІКА\s+КРИМ$',  # 1. АВТОНОМНА РЕСПУБЛІКА КРИМ
-        r'^\d+\.\s*М\.\s*[А-ЯІЇЄ\s]+$',        # 12. М. СЕВАСТОПОЛЬ
-        r'^[А-ЯІЇЄ\s]+район$',                 # Криворізький район
-        r'^Найменування$',                      # Заголовок колонки
-        r'^Код$',                               # Заголовок колонки
-        r'^Дата\s+',                            # Заголовки дат
-    ]
+    if TERRITORY_CODE_PATTERN.match(first_col):
+        return ROW_TERRITORY
     
-    for pattern in header_patterns:
-        if re.match(pattern, first_col, re.IGNORECASE) or re.match(pattern, second_col, re.IGNORECASE):
-            return True
+    # Рядки розділів об'єднані по всій ширині таблиці, тому всі колонки однакові
+    if len(row_data) >= 2 and row_data[0] == row_data[1]:
+        if OBLAST_SECTION_PATTERN.match(row_data[0]):
+            return ROW_OBLAST
+        if RAION_SECTION_PATTERN.search(row_data[0]):
+            return ROW_RAION
     
-    # Якщо всі колонки однакові - це заголовок
-    if len(row_data) >= 2 and all(col.strip() == first_col for col in row_data[:2]):
-        return True
+    if COLUMN_HEADER_PATTERN.match(first_col):
+        return ROW_COLUMN_HEADER
     
-    return False
+    if MALFORMED_CODE_PATTERN.match(first_col):
+        return ROW_MALFORMED_CODE
+    
+    return ROW_OTHER
 
-def is_valid_territory_code(code):
+def detect_table_layout(headers):
     """
-    Перевіряє, чи є код валідним кодом території
-    Виправлено: UA + 17 цифр
+    Визначає колонки коду, назви та статуси, дата-колонки яких
+    (за STATUS_DATE_CONFIG) присутні в заголовках таблиці
     """
-    if not code or not isinstance(code, str):
-        return False
+    normalized = [normalize_header(header) for header in headers]
     
-    # Код території має формат UA + 17 цифр
-    return re.match(r'^UA\d{17}$', code.strip())
+    def column_index(header_text):
+        target = normalize_header(header_text)
+        return normalized.index(target) if target in normalized else None
+    
+    code_idx = column_index(CODE_COLUMN_HEADER)
+    name_idx = column_index(NAME_COLUMN_HEADER)
+    
+    candidates = {}
+    for status, config in STATUS_DATE_CONFIG.items():
+        start_idx = column_index(config['start_date_column'])
+        end_idx = column_index(config['end_date_column'])
+        if start_idx is not None and end_idx is not None:
+            candidates[status] = (start_idx, end_idx)
+    
+    return {
+        'code': code_idx if code_idx is not None else 0,
+        'name': name_idx if name_idx is not None else 1,
+        'candidates': candidates
+    }
 
-def parse_date_safely(date_str):
+def resolve_table_status(candidates, title, chapter):
     """
-    Безпечний парсинг дати з обробкою різних форматів
+    Вибір статусу серед кандидатів з однаковими дата-колонками:
+    за заголовком перед таблицею або за номером розділу ("2.1." -> "2.")
     """
-    if not date_str or not isinstance(date_str, str):
-        return None
+    if len(candidates) == 1:
+        return next(iter(candidates))
     
-    date_str = date_str.strip()
-    if not date_str:
-        return None
-    
-    # Видаляємо зайві символи, але зберігаємо точки та слеші
-    date_str = re.sub(r'[^\d./]', '', date_str)
-    
-    # Якщо є кілька дат через перенос, беремо першу
-    if '\n' in date_str:
-        date_str = date_str.split('\n')[0]
+    if title:
+        for status in candidates:
+            if normalize_header(status.value) == normalize_header(title):
+                return status
     
-    # Різні формати дат
-    date_formats = [
-        '%d.%m.%Y',    # 27.09.2024
-        '%d/%m/%Y',    # 27/09/2024
-        '%d.%m.%y',    # 27.09.24
-        '%d/%m/%y',    # 27/09/24
-    ]
+    title_match = OBLAST_SECTION_PATTERN.match(title) if title else None
+    for number in (chapter, title_match.group(1) if title_match else None):
+        if not number:
+            continue
+        for status in candidates:
+            if status.value.startswith(f"{number}."):
+                return status
     
-    for fmt in date_formats:
+    return None
+
+# Дата у комірці: ДД.ММ.РРРР, ДД/ММ/РРРР або ДД.ММ.РР (допускаємо зайві пробіли: "12.11 2022", "31.03. 2022")
+DATE_TOKEN_PATTERN = re.compile(r'(\d{1,2})\s*[./]\s*(\d{1,2})(?:\s*[./]\s*|\s+)(\d{4}|\d{2})')
+
+@lru_cache(maxsize=None)
+def extract_dates(cell_text):
+    """
+    Витягує всі дати з комірки таблиці (кілька дат розділені переносом рядка)
+    Повертає кортеж (дати, нерозпізнані фрагменти); результат кешується,
+    бо більшість комірок документа містить кілька десятків однакових дат
+    """
+    if not cell_text or not isinstance(cell_text, str):
+        return (), ()
+
+    dates = []
+    failed = []
+
+    for fragment in cell_text.split('\n'):
+        fragment = fragment.strip()
+        if not fragment:
+            continue
+
+        match = DATE_TOKEN_PATTERN.fullmatch(fragment)
+        if not match:
+            failed.append(fragment)
+            continue
+
+        day, month, year = (int(part) for part in match.groups())
+        if year < 100:
+            year += 2000
+
         try:
-            return datetime.strptime(date_str, fmt)
+            dates.append(datetime(year, month, day))
         except ValueError:
-            continue
+            failed.append(fragment)
+
+    return tuple(dates), tuple(failed)
+
+def normalize_date_column(cells):
+    """
+    Парсинг цілої колонки дат за один прохід: кожне унікальне значення
+    розбирається лише один раз
+    """
+    parsed = {cell: extract_dates(cell) for cell in set(cells)}
+    return [parsed[cell] for cell in cells]
+
+def pair_status_periods(start_dates, end_dates):
+    """
+    Формує періоди статусу з дат початку та кінця однієї комірки:
+    i-та дата початку відповідає i-й даті кінця (остання може бути відкритою)
+    """
+    periods = []
+    for i, start_date in enumerate(start_dates):
+        end_date = end_dates[i] if i < len(end_dates) else None
+        periods.append((start_date, end_date))
+    return periods
+
+def normalize_table_dates(tables_data):
+    """
+    Етап нормалізації дат: розбирає колонки дат усіх таблиць
+    та додає до кожної таблиці періоди по рядках ('row_periods')
+    Повертає список комірок, які не вдалося розібрати
+    """
+    date_errors = []
+
+    for table_data in tables_data:
+        valid_rows = table_data['valid_rows']
+
+        start_cells = [row[START_DATE_IDX] for row in valid_rows]
+        end_cells = [row[END_DATE_IDX] for row in valid_rows]
+
+        start_column = normalize_date_column(start_cells)
+        end_column = normalize_date_column(end_cells)
+
+        row_periods = []
+        for row, (start_dates, start_failed), (end_dates, end_failed) in zip(valid_rows, start_column, end_column):
+            for column, failed in (('start_date', start_failed), ('end_date', end_failed)):
+                for fragment in failed:
+                    date_errors.append({
+                        'table': table_data['table_index'],
+                        'code': row[CODE_IDX],
+                        'name': row[NAME_IDX],
+                        'column': column,
+                        'value': fragment
+                    })
+
+            if len(end_dates) > len(start_dates):
+                date_errors.append({
+                    'table': table_data['table_index'],
+                    'code': row[CODE_IDX],
+                    'name': row[NAME_IDX],
+                    'column': 'end_date',
+                    'value': f"{len(end_dates)} дат кінця на {len(start_dates)} дат початку"
+                })
+
+            row_periods.append(pair_status_periods(start_dates, end_dates))
+
+        table_data['row_periods'] = row_periods
+
+    if date_errors:
+        print(f"\n⚠️  НЕРОЗПІЗНАНІ ДАТИ ({len(date_errors)}):")
+        for error in date_errors[:10]:
+            print(f"  • Таблиця {error['table']}, {error['code']} ({error['column']}): '{error['value']}'")
+        if len(date_errors) > 10:
+            print(f"  ... та ще {len(date_errors) - 10}")
+
+    return date_errors
+
+W_TBL, W_TR, W_TC, W_P, W_T, W_BR, W_CR, W_TAB = (
+    qn(tag) for tag in ('w:tbl', 'w:tr', 'w:tc', 'w:p', 'w:t', 'w:br', 'w:cr', 'w:tab')
+)
+W_GRID_SPAN_PATH = f"{qn('w:tcPr')}/{qn('w:gridSpan')}"
+W_VAL = qn('w:val')
+
+def read_element_text(element):
+    """
+    Текст комірки або абзацу безпосередньо з XML (як cell.text у python-docx:
+    абзаци та розриви рядка дають перенос)
+    """
+    paragraphs = []
+    for p in element.iter(W_P):
+        parts = []
+        for child in p.iter(W_T, W_BR, W_CR, W_TAB):
+            if child.tag == W_T:
+                parts.append(child.text or '')
+            elif child.tag == W_TAB:
+                parts.append('\t')
+            else:
+                parts.append('\n')
+        paragraphs.append(''.join(parts))
+    return '\n'.join(paragraphs)
+
+def read_table_rows(tbl):
+    """
+    Читання всіх рядків таблиці (елемент w:tbl) за один прохід по XML
+    table.rows[i].cells щоразу перебудовує сітку таблиці, тому на великих
+    таблицях парсинг ставав квадратичним; об'єднані по горизонталі комірки
+    повторюються, як і в row.cells
+    """
+    rows = []
+    for tr in tbl.iterchildren(W_TR):
+        row = []
+        for tc in tr.iterchildren(W_TC):
+            grid_span = tc.find(W_GRID_SPAN_PATH)
+            span = int(grid_span.get(W_VAL)) if grid_span is not None else 1
+            row.extend([read_element_text(tc).strip()] * span)
+        rows.append(row)
+    return rows
+
+def classify_table_rows(rows, code_idx):
+    """
+    Один прохід по рядках таблиці: рядки територій разом з контекстом
+    розділу (область/район), рядки з пошкодженими кодами та номер розділу
+    """
+    territory_rows = []
+    row_sections = []
+    malformed_rows = []
+    chapter = None
+    oblast = None
+    raion = None
     
-    # Спробуємо парсер з dateutil
-    try:
-        return parser.parse(date_str, dayfirst=True)
-    except:
-        return None
+    for row_data in rows:
+        kind = classify_row(row_data, code_idx)
+        
+        if kind == ROW_TERRITORY:
+            territory_rows.append(row_data)
+            row_sections.append({'oblast': oblast, 'raion': raion})
+        elif kind == ROW_OBLAST:
+            match = OBLAST_SECTION_PATTERN.match(row_data[0])
+            if chapter is None and match.group(2):
+                chapter = match.group(1)
+            oblast = match.group(3).strip()
+            raion = None
+        elif kind == ROW_RAION:
+            raion = row_data[0]
+        elif kind == ROW_MALFORMED_CODE:
+            malformed_rows.append(row_data)
+    
+    return territory_rows, row_sections, malformed_rows, chapter
 
-def parse_docx_tables_improved(filename):
+def parse_docx_tables_improved(filename, verbose=True):
     """
     Покращений парсинг таблиць з DOCX документа
+    Статус і дата-колонки кожної таблиці визначаються за її заголовками
+    (STATUS_DATE_CONFIG) та назвою перед таблицею, а не за позицією в документі
     """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    
     try:
         doc = docx.Document(filename)
-        print(f"📄 Документ успішно відкрито: {filename}")
-        print(f"📊 Кількість таблиць: {len(doc.tables)}")
+        body = doc.element.body
+        log(f"📄 Документ успішно відкрито: {filename}")
+        log(f"📊 Кількість таблиць: {len(body.findall(W_TBL))}")
         
         tables_data = []
+        table_idx = 0
+        title = ''
         
-        for table_idx, table in enumerate(doc.tables):
-            print(f"\n=== ТАБЛИЦЯ {table_idx + 1} ===")
+        for element in body.iterchildren(W_P, W_TBL):
+            # Запам'ятовуємо останній непорожній абзац перед таблицею
+            if element.tag == W_P:
+                text = WHITESPACE_PATTERN.sub(' ', read_element_text(element)).strip()
+                if text:
+                    title = text
+                continue
             
-            if len(table.rows) == 0:
-                print("Таблиця порожня")
+            table_idx += 1
+            table_title, title = title, ''
+            log(f"\n=== ТАБЛИЦЯ {table_idx} ===")
+            
+            rows = read_table_rows(element)
+            if len(rows) == 0:
+                log("Таблиця порожня")
                 continue
             
-            # Отримуємо заголовки
-            headers = []
-            if table.rows:
-                header_row = table.rows[0]
-                headers = [cell.text.strip() for cell in header_row.cells]
-                print(f"Заголовки: {headers}")
+            # Отримуємо заголовки та розкладку колонок
+            headers = rows[0]
+            log(f"Заголовки: {headers}")
+            layout = detect_table_layout(headers)
+            
+            territory_rows, row_sections, malformed_rows, chapter = classify_table_rows(rows[1:], layout['code'])
             
-            # Визначаємо статус на основі індексу таблиці
-            if table_idx == 0:  # Таблица 1
-                status = TerritoryStatus.POSSIBLE_COMBAT
-            elif table_idx == 1:  # Таблица 2
-                status = TerritoryStatus.ACTIVE_COMBAT
-            elif table_idx == 2:  # Таблица 3
-                status = TerritoryStatus.ACTIVE_COMBAT_WITH_RESOURCES
-            elif table_idx in [3, 4]:  # Таблиці 4, 5
-                status = TerritoryStatus.TEMPORARILY_OCCUPIED
+            # Визначаємо статус за заголовками таблиці
+            status = resolve_table_status(layout['candidates'], table_title, chapter)
+            
+            log(f"Статус: {status.value if status else 'Невідомий'}")
+            
+            if status:
+                start_idx, end_idx = layout['candidates'][status]
             else:
-                status = None
+                log(f"⚠️  Не вдалося визначити статус за заголовками: {headers}")
+                start_idx, end_idx = None, None
             
-            print(f"Статус: {status.value if status else 'Невідомий'}")
+            column_indexes = (layout['code'], layout['name'], start_idx, end_idx)
             
-            # Збираємо дані з таблиці
+            # Збираємо дані з таблиці (колонки в канонічному порядку: код, назва, дата початку, дата кінця)
             table_data = {
-                'table_index': table_idx + 1,
+                'table_index': table_idx,
                 'status': status.value if status else 'Невідомий',
+                'title': table_title,
                 'headers': headers,
-                'valid_rows': []
+                'layout': dict(zip(('code', 'name', 'start_date', 'end_date'), column_indexes)),
+                'valid_rows': [
+                    [row_data[i] if i is not None and i < len(row_data) else '' for i in column_indexes]
+                    for row_data in territory_rows
+                ],
+                'row_sections': row_sections,
+                'malformed_rows': malformed_rows
             }
             
-            # Обробляємо всі рядки крім заголовка
-            for row_idx in range(1, len(table.rows)):
-                row = table.rows[row_idx]
-                row_data = [cell.text.strip() for cell in row.cells]
-                
-                # Пропускаємо заголовки областей/районів
-                if is_header_row(row_data):
-                    continue
-                
-                # Перевіряємо, чи є валідний код території
-                if len(row_data) >= 1 and is_valid_territory_code(row_data[0]):
-                    table_data['valid_rows'].append(row_data)
-            
             tables_data.append(table_data)
-            print(f"Знайдено {len(table_data['valid_rows'])} валідних рядків")
+            log(f"Знайдено {len(table_data['valid_rows'])} валідних рядків")
+            if malformed_rows:
+                log(f"⚠️  Рядків з пошкодженим кодом: {len(malformed_rows)} ({', '.join(row[layout['code']] for row in malformed_rows[:5])})")
         
         return tables_data
         
@@ -265,6 +516,133 @@ def parse_docx_tables_improved(filename):
         print(f"❌ Помилка при парсингу документа: {e}")
         return None
 
+# Очікувана категорія класифікатора за префіксом/типом у назві з документа
+NAME_CATEGORY_PATTERNS = [
+    (re.compile(r'^[сc]\s*\.\s*', re.IGNORECASE), {'C'}),  # у документі трапляється латинська "c."
+    (re.compile(r'^([сc]-ще|смт)\s+', re.IGNORECASE), {'X'}),
+    (re.compile(r'^[мm]\s*\.\s*', re.IGNORECASE), {'M', 'K'}),
+    (re.compile(r'територіальн\w*\s+громад', re.IGNORECASE), {'H'}),
+    (re.compile(r'\bрайон\b', re.IGNORECASE), {'P', 'B'}),
+    (re.compile(r'\bобласть\b|республіка\s+крим', re.IGNORECASE), {'O'}),
+]
+
+def expected_categories_for_name(territory_name):
+    """
+    Визначає допустимі категорії класифікатора за назвою з документа
+    """
+    for pattern, categories in NAME_CATEGORY_PATTERNS:
+        if pattern.search(territory_name):
+            return categories
+    return None
+
+def normalize_territory_name(name):
+    """
+    Нормалізація назви для порівняння з класифікатором
+    """
+    return re.sub(r'\s+', ' ', name.replace('’', "'").replace('ʼ', "'").replace('`', "'")).strip().lower()
+
+def preflight_validate(tables_data, classifier_index):
+    """
+    Офлайн-перевірка всіх кодів документа за локальним класифікатором
+    (до відкриття з'єднання з базою)
+    """
+    report = {
+        'not_found': [],
+        'renamed': [],
+        'category_mismatch': [],
+        'tables': []
+    }
+    
+    for table_data in tables_data:
+        table_index = table_data['table_index']
+        row_periods = table_data.get('row_periods') or [[]] * len(table_data['valid_rows'])
+        
+        table_stats = {
+            'table': table_index,
+            'status': table_data['status'],
+            'rows': len(table_data['valid_rows']),
+            'periods': sum(len(periods) for periods in row_periods),
+            'found': 0,
+            'not_found': 0,
+            'renamed': 0,
+            'category_mismatch': 0
+        }
+        
+        for row_data in table_data['valid_rows']:
+            territory_code = row_data[CODE_IDX].strip()
+            territory_name = row_data[NAME_IDX]
+            
+            entry = classifier_index.get(territory_code)
+            issue_base = {
+                'table': table_index,
+                'code': territory_code,
+                'name': territory_name,
+                'status': table_data['status']
+            }
+            
+            if entry is None:
+                report['not_found'].append(issue_base)
+                table_stats['not_found'] += 1
+                continue
+            
+            table_stats['found'] += 1
+            
+            if normalize_territory_name(entry['name']) not in normalize_territory_name(territory_name):
+                report['renamed'].append({**issue_base, 'classifier_name': entry['name']})
+                table_stats['renamed'] += 1
+            
+            expected = expected_categories_for_name(territory_name)
+            if expected and entry['category'] not in expected:
+                report['category_mismatch'].append({
+                    **issue_base,
+                    'classifier_category': entry['category'],
+                    'expected_categories': sorted(expected)
+                })
+                table_stats['category_mismatch'] += 1
+        
+        report['tables'].append(table_stats)
+    
+    total_rows = sum(table['rows'] for table in report['tables'])
+    report['total_rows'] = total_rows
+    report['total_periods'] = sum(table['periods'] for table in report['tables'])
+    report['not_found_ratio'] = len(report['not_found']) / total_rows if total_rows else 0.0
+    report['passed'] = report['not_found_ratio'] <= PREFLIGHT_CONFIG['max_not_found_ratio']
+    
+    return report
+
+def print_preflight_report(report):
+    """
+    Виведення результатів офлайн-перевірки
+    """
+    print("\n🛫 ПОПЕРЕДНЯ ПЕРЕВІРКА ЗА КЛАСИФІКАТОРОМ:")
+    print("-" * 60)
+    for table in report['tables']:
+        print(f"  Таблиця {table['table']}: {table['status']}")
+        print(f"    рядків {table['rows']}, періодів {table['periods']}, знайдено {table['found']}, "
+              f"не знайдено {table['not_found']}, перейменовано {table['renamed']}, "
+              f"невідповідність категорії {table['category_mismatch']}")
+    
+    for key, title in [('not_found', 'НЕ ЗНАЙДЕНІ В КЛАСИФІКАТОРІ'),
+                       ('renamed', 'НАЗВА НЕ ЗБІГАЄТЬСЯ З КЛАСИФІКАТОРОМ'),
+                       ('category_mismatch', 'НЕВІДПОВІДНІСТЬ КАТЕГОРІЇ')]:
+        issues = report[key]
+        if not issues:
+            continue
+        print(f"\n⚠️  {title} ({len(issues)}):")
+        for issue in issues[:10]:
+            details = ''
+            if 'classifier_name' in issue:
+                details = f" -> '{issue['classifier_name']}'"
+            elif 'classifier_category' in issue:
+                details = f" -> {issue['classifier_category']} (очікувалось {', '.join(issue['expected_categories'])})"
+            print(f"  • Таблиця {issue['table']}: {issue['name']} ({issue['code']}){details}")
+        if len(issues) > 10:
+            print(f"  ... та ще {len(issues) - 10}")
+    
+    with open(PREFLIGHT_CONFIG['report_file'], 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\n📄 Звіт перевірки збережено в {PREFLIGHT_CONFIG['report_file']}")
+
 def find_territory_in_mongodb(client, territory_name, territory_code=None):
     """
     Пошук території в MongoDB
@@ -332,11 +710,9 @@ def add_status_period_to_territory(client, territory_doc, collection_name, statu
     if territory_code:
         status_record['territory_code'] = territory_code
     
-    # Отримуємо поточну історію
-    if history_field in territory_doc:
-        history = territory_doc[history_field]
-    else:
-        history = []
+    # Отримуємо поточну історію (список лишається в territory_doc, щоб кілька
+    # періодів одного рядка накопичувались, а не перезаписували один одного)
+    history = territory_doc.setdefault(history_field, [])
     
     # Перевіряємо, чи не існує вже такий запис з цієї сесії імпорту
     existing_record = None
@@ -355,22 +731,16 @@ def add_status_period_to_territory(client, territory_doc, collection_name, statu
     history.append(status_record)
     
     # Оновлюємо документ
+    # Поля поточного статусу виводяться з активних періодів після імпорту (status_current.py)
     update_data = {
         "$set": {
             history_field: history,
-            "current_status": status,
             "last_status_update": datetime.now(timezone.utc),
             "last_import_id": import_id,
             "last_import_version": IMPORT_CONFIG['import_version']
         }
     }
     
-    if start_date:
-        update_data["$set"]["status_start_date"] = start_date
-    
-    if end_date:
-        update_data["$set"]["status_end_date"] = end_date
-    
     collection.update_one({"_id": territory_doc["_id"]}, update_data)
     
     print(f"✅ Додано статус '{status}' для: {territory_doc['name']} (імпорт {import_id})")
@@ -395,65 +765,53 @@ def import_tables_data_improved(client, tables_data, import_id):
         print(f"\n📊 Обробляю таблицю {table_index} - {status}")
         print(f"📋 Кількість валідних рядків: {len(valid_rows)}")
         
-        # Знаходимо індекси колонок
-        code_idx = 0  # Код завжди перший
-        name_idx = 1  # Назва завжди друга
-        start_date_idx = 2  # Дата початку завжди третя
-        end_date_idx = 3  # Дата кінця завжди четверта
+        # Періоди вже розібрані на етапі нормалізації дат
+        row_periods = table_data.get('row_periods')
+        if row_periods is None:
+            normalize_table_dates([table_data])
+            row_periods = table_data['row_periods']
         
         imported_in_table = 0
         errors_in_table = 0
         
-        for row_idx, row_data in enumerate(valid_rows):
-            if len(row_data) < 4:
-                continue
-            
-            territory_code = row_data[code_idx] if len(row_data) > code_idx else ""
-            territory_name = row_data[name_idx] if len(row_data) > name_idx else ""
+        for row_data, periods in zip(valid_rows, row_periods):
+            # Рядки вже в канонічному порядку колонок (див. parse_docx_tables_improved)
+            territory_code = row_data[CODE_IDX]
+            territory_name = row_data[NAME_IDX]
             
-            # Парсимо дати
-            start_date = None
-            end_date = None
-            
-            try:
-                if len(row_data) > start_date_idx and row_data[start_date_idx]:
-                    start_date = parse_date_safely(row_data[start_date_idx])
-                
-                if len(row_data) > end_date_idx and row_data[end_date_idx]:
-                    end_date = parse_date_safely(row_data[end_date_idx])
-            except Exception as e:
-                print(f"⚠️  Помилка парсингу дати для {territory_name}: {e}")
-                errors_in_table += 1
-                continue
+            # Комірка без жодної розпізнаної дати - імпортуємо період без дат, як і раніше
+            if not periods:
+                periods = [(None, None)]
             
             # Шукаємо територію в MongoDB
             territory_doc, collection_name = find_territory_in_mongodb(client, territory_name, territory_code)
             
             if territory_doc:
-                try:
-                    success = add_status_period_to_territory(
-                        client, 
-                        territory_doc, 
-                        collection_name, 
-                        status, 
-                        start_date, 
-                        end_date,
-                        territory_code=territory_code,
-                        table_source=table_index,
-                        import_id=import_id
-                    )
-                    
-                    if success:
-                        imported_in_table += 1
-                        total_imported += 1
-                    else:
+                for start_date, end_date in periods:
+                    try:
+                        success = add_status_period_to_territory(
+                            client, 
+                            territory_doc, 
+                            collection_name, 
+                            status, 
+                            start_date, 
+                            end_date,
+                            territory_code=territory_code,
+                            table_source=table_index,
+                            import_id=import_id
+                        )
+                        
+                        if success:
+                            imported_in_table += 1
+                            total_imported += 1
+                        else:
+                            errors_in_table += 1
+                            total_errors += 1
+                            
+                    except Exception as e:
+                        print(f"❌ Помилка додавання запису для {territory_name}: {e}")
                         errors_in_table += 1
                         total_errors += 1
-                        
-                except Exception as e:
-                    print(f"❌ Помилка додавання запису для {territory_name}: {e}")
-                    errors_in_table += 1
-                    total_errors += 1
             else:
                 not_found_territories.append({
                     'name': territory_name,
@@ -489,75 +847,29 @@ def import_tables_data_improved(client, tables_data, import_id):
 
 def show_import_statistics(client):
     """
-    Показ статистики після імпорту
+    Показ статистики після імпорту (одна агрегація на сервері, див. status_statistics)
     """
-    db = client[DATABASE_NAME]
-    
-    collections = [
-        'level1_regions',
-        'level2_raions', 
-        'level3_hromadas',
-        'level4_settlements',
-        'level_additional_city_districts'
-    ]
-    
     print("\n📈 СТАТИСТИКА ПІСЛЯ ІМПОРТУ:")
     print("-" * 40)
     print(f"📄 Документ: {IMPORT_CONFIG['document_name']}")
     print(f"📅 Дата документа: {IMPORT_CONFIG['document_date']}")
     print("-" * 40)
     
-    total_with_status = 0
-    status_counts = {}
-    document_dates = set()
+    statistics = get_status_statistics(client)
     
-    for collection_name in collections:
-        collection = db[collection_name]
-        
-        # Території з історією статусів
-        with_status = collection.count_documents({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        total_with_status += with_status
-        
-        print(f"{collection_name}: {with_status} територій зі статусами")
-        
-        # Підрахунок по статусах та збір дат документів
-        territories = collection.find({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        for territory in territories:
-            for history_field in ['occupation_history', 'combat_history', 'status_history']:
-                if history_field in territory:
-                    for period in territory[history_field]:
-                        status = period.get('status', 'Невідомий')
-                        if status not in status_counts:
-                            status_counts[status] = 0
-                        status_counts[status] += 1
-                        
-                        # Збираємо дати документів
-                        if 'document_date' in period:
-                            document_dates.add(period['document_date'])
+    for collection_name, counts in statistics['collections'].items():
+        print(f"{collection_name}: {counts['with_history']} територій зі статусами")
     
     print(f"\n📊 ЗАГАЛЬНА СТАТИСТИКА:")
-    print(f"Територій зі статусами: {total_with_status}")
+    print(f"Територій зі статусами: {statistics['totals']['with_history']}")
     
-    if document_dates:
+    if statistics['document_dates']:
         print(f"\n📅 ДАТИ ДОКУМЕНТІВ У БАЗІ:")
-        for doc_date in sorted(document_dates):
+        for doc_date in statistics['document_dates']:
             print(f"  • {doc_date}")
     
     print(f"\n📋 РОЗПОДІЛ ПО СТАТУСАХ:")
-    for status, count in sorted(status_counts.items()):
+    for status, count in sorted(statistics['status_counts'].items()):
         print(f"  {status}: {count}")
 
 def show_import_history(client):
@@ -577,7 +889,7 @@ def show_import_history(client):
         return
     
     for imp in imports:
-        status_icon = "✅" if imp.get('status') == 'completed' else "🔄" if imp.get('status') == 'in_progress' else "❌"
+        status_icon = {'completed': "✅", 'in_progress': "🔄", 'rolled_back': "↩️ "}.get(imp.get('status'), "❌")
         
         print(f"{status_icon} {imp['import_id']} - {imp['document_name']} ({imp['document_date']})")
         print(f"    Версія: {imp['import_version']}")
@@ -593,6 +905,9 @@ def show_import_history(client):
         if imp.get('import_description'):
             print(f"    Опис: {imp['import_description']}")
         
+        if imp.get('rolled_back_at'):
+            print(f"    Відкочено: {imp['rolled_back_at'].strftime('%Y-%m-%d %H:%M:%S')}")
+        
         print()
 
 def main():
@@ -604,6 +919,47 @@ def main():
     print(f"🔢 Версія імпорту: {IMPORT_CONFIG['import_version']}")
     print("=" * 60)
     
+    # Парсимо документ (без звернення до бази)
+    filename = "Перелик 07052025.docx"
+    print(f"\n📄 Парсинг документа: {filename}")
+    
+    tables_data = parse_docx_tables_improved(filename)
+    if not tables_data:
+        print("❌ Не вдалося отримати дані з документа")
+        return
+    
+    # Нормалізуємо дати всіх таблиць за один прохід
+    date_errors = normalize_table_dates(tables_data)
+    
+    # Перевіряємо коди за локальним класифікатором до підключення до бази
+    preflight = preflight_validate(tables_data, load_classifier_index())
+    print_preflight_report(preflight)
+    
+    if not preflight['passed']:
+        print(f"\n❌ Документ не пройшов перевірку: {len(preflight['not_found'])} з {preflight['total_rows']} кодів "
+              f"({preflight['not_found_ratio']:.1%}) відсутні в класифікаторі "
+              f"(допустимо {PREFLIGHT_CONFIG['max_not_found_ratio']:.1%})")
+        print("❌ Імпорт скасовано")
+        return
+    
+    # Підтвердження імпорту
+    print(f"\n📋 Підготовлено до імпорту:")
+    total_valid_rows = preflight['total_rows']
+    for table in preflight['tables']:
+        print(f"  Таблиця {table['table']}: {table['status']} - {table['rows']} валідних рядків, {table['periods']} періодів "
+              f"(в класифікаторі {table['found']}, не знайдено {table['not_found']})")
+    
+    print(f"📊 Загалом валідних рядків: {total_valid_rows}, періодів: {preflight['total_periods']}")
+    print(f"⚠️  Не знайдено в класифікаторі: {len(preflight['not_found'])}")
+    print(f"⚠️  Перейменовано: {len(preflight['renamed'])}")
+    print(f"⚠️  Невідповідність категорії: {len(preflight['category_mismatch'])}")
+    print(f"⚠️  Нерозпізнаних дат: {len(date_errors)}")
+    
+    confirm = input("\n🤔 Продовжити імпорт? (y/N): ").strip().lower()
+    if confirm != 'y':
+        print("❌ Імпорт скасовано")
+        return
+    
     # Підключаємося до MongoDB
     client = connect_to_mongodb()
     
@@ -611,37 +967,19 @@ def main():
         # Створюємо сесію імпорту
         import_id = create_import_session(client)
         
-        # Парсимо документ
-        filename = "Перелик 07052025.docx"
-        print(f"\n📄 Парсинг документа: {filename}")
-        
-        tables_data = parse_docx_tables_improved(filename)
-        if not tables_data:
-            print("❌ Не вдалося отримати дані з документа")
-            return
-        
-        # Оновлюємо сесію з кількістю таблиць
+        # Оновлюємо сесію з кількістю таблиць та результатами перевірки
         update_import_session(client, import_id, {
             'tables_count': len(tables_data),
-            'total_rows': sum(len(table['valid_rows']) for table in tables_data)
+            'total_rows': total_valid_rows,
+            'date_errors': date_errors,
+            'preflight': {
+                'tables': preflight['tables'],
+                'not_found': len(preflight['not_found']),
+                'renamed': len(preflight['renamed']),
+                'category_mismatch': len(preflight['category_mismatch'])
+            }
         })
         
-        # Підтвердження імпорту
-        print(f"\n📋 Підготовлено до імпорту:")
-        total_valid_rows = 0
-        for table in tables_data:
-            valid_count = len(table['valid_rows'])
-            total_valid_rows += valid_count
-            print(f"  Таблиця {table['table_index']}: {table['status']} - {valid_count} валідних рядків")
-        
-        print(f"📊 Загалом валідних рядків: {total_valid_rows}")
-        
-        confirm = input("\n🤔 Продовжити імпорт? (y/N): ").strip().lower()
-        if confirm != 'y':
-            print("❌ Імпорт скасовано")
-            update_import_session(client, import_id, {'status': 'cancelled'})
-            return
-        
         # Імпортуємо дані
         total_imported, total_errors, not_found = import_tables_data_improved(client, tables_data, import_id)
         
@@ -653,6 +991,21 @@ def main():
             'not_found_territories': not_found
         })
         
+        # Поширюємо статуси на підпорядковані території
+        _, propagated_codes = propagate_status_to_descendants(client)
+        
+        # Оновлюємо пласку колекцію періодів для запитів "статус на дату"
+        rebuild_status_periods(client)
+        
+        # Перераховуємо поточний статус лише для територій, яких торкнувся імпорт
+        touched_codes = set(client[DATABASE_NAME][STATUS_PERIODS_COLLECTION].distinct(
+            'territory_code', {'import_id': import_id}
+        ))
+        recompute_current_status(client, touched_codes | propagated_codes)
+        
+        # Оновлюємо зведення по областях і районах для нової версії даних
+        build_status_rollups(client)
+        
         # Показуємо статистику
         show_import_statistics(client)
         
@@ -679,4 +1032,4 @@ def main():
         print("\n🔌 З'єднання з MongoDB закрито")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Версіоновані міграції схеми даних територій
+Кожна міграція - пронумерований серверний update_many, що виконується пакетами
+за діапазонами _id; після кожного пакета в колекції schema_migrations
+зберігається контрольна точка, тож перерваний запуск продовжується з неї
+Пробний запуск показує кількість документів і орієнтовний час
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from status_periods import connect_to_mongodb, rebuild_status_periods, DATABASE_NAME
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS, INHERITED_HISTORY_FIELD
+from update_document_dates import DOCUMENT_CONFIG
+
+SCHEMA_MIGRATIONS_COLLECTION = 'schema_migrations'
+
+MIGRATION_BATCH_SIZE = 5000
+
+# Швидкість для оцінки часу, поки немає виміряної на попередніх міграціях
+DEFAULT_DOCS_PER_SECOND = 5000
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+
+def _backfill_period_condition():
+    """
+    Умова (для $elemMatch) періоду без дати документа: лише періоди цього документа
+    або без джерела, тож дати інших редакцій Переліку не перезаписуються
+    """
+    return {
+        "source_document": {"$in": [None, DOCUMENT_CONFIG['document_name']]},
+        "$or": [{"document_date": None}, {"document_date_iso": None}]
+    }
+
+def _document_dates_backfill_filter():
+    return {"$or": [{field: {"$elemMatch": _backfill_period_condition()}} for field in HISTORY_FIELDS]}
+
+def _document_dates_backfill_update():
+    # Заповнюються лише відсутні значення; решта періодів лишається як є
+    def missing(name):
+        return {"$eq": [{"$ifNull": [f"$$period.{name}", None]}, None]}
+
+    def patched_history(field):
+        return {
+            "$cond": [
+                {"$isArray": f"${field}"},
+                {
+                    "$map": {
+                        "input": f"${field}",
+                        "as": "period",
+                        "in": {
+                            "$cond": [
+                                {"$and": [
+                                    {"$in": [{"$ifNull": ["$$period.source_document", None]},
+                                             [None, DOCUMENT_CONFIG['document_name']]]},
+                                    {"$or": [missing('document_date'), missing('document_date_iso')]}
+                                ]},
+                                {"$mergeObjects": ["$$period", {
+                                    "document_date": {"$ifNull": ["$$period.document_date", DOCUMENT_CONFIG['document_date']]},
+                                    "document_date_iso": {
+                                        "$ifNull": ["$$period.document_date_iso", DOCUMENT_CONFIG['document_date_iso']]
+                                    },
+                                    "source_document": DOCUMENT_CONFIG['document_name']
+                                }]},
+                                "$$period"
+                            ]
+                        }
+                    }
+                },
+                "$$REMOVE"
+            ]
+        }
+
+    return [{"$set": {
+        **{field: patched_history(field) for field in HISTORY_FIELDS},
+        "last_status_update": "$$NOW"
+    }}]
+
+def _empty_histories_filter():
+    return {"$or": [{field: {"$size": 0}} for field in HISTORY_FIELDS + [INHERITED_HISTORY_FIELD]]}
+
+def _empty_histories_update():
+    # Поле видаляється лише якщо масив порожній
+    return [
+        {"$set": {
+            field: {"$cond": [{"$eq": [{"$size": {"$ifNull": [f"${field}", []]}}, 0]}, "$$REMOVE", f"${field}"]}
+            for field in HISTORY_FIELDS + [INHERITED_HISTORY_FIELD]
+        }}
+    ]
+
+# Міграції у порядку застосування; номер не змінюється після публікації
+# filter/update - функції, що повертають фільтр і оновлення для update_many,
+# after - перебудова похідних даних після міграції (опціонально)
+MIGRATIONS = [
+    {
+        'id': 1,
+        'name': 'document_dates_backfill',
+        'description': f"Відсутні дата документа та ISO дата в періодах {DOCUMENT_CONFIG['document_name']}",
+        'filter': _document_dates_backfill_filter,
+        'update': _document_dates_backfill_update,
+        'after': rebuild_status_periods
+    },
+    {
+        'id': 2,
+        'name': 'remove_empty_histories',
+        'description': "Видалення порожніх масивів історій статусів",
+        'filter': _empty_histories_filter,
+        'update': _empty_histories_update,
+        'after': rebuild_status_periods
+    }
+]
+
+def get_migration_records(client):
+    """
+    Записи про міграції з schema_migrations за номером
+    """
+    db = client[DATABASE_NAME]
+    return {record['_id']: record for record in db[SCHEMA_MIGRATIONS_COLLECTION].find()}
+
+def pending_migrations(client):
+    """
+    Міграції, що ще не завершені (разом з перерваними)
+    """
+    records = get_migration_records(client)
+    return [
+        migration for migration in MIGRATIONS
+        if records.get(migration['id'], {}).get('status') != STATUS_COMPLETED
+    ]
+
+def _measured_docs_per_second(records):
+    """
+    Середня швидкість завершених міграцій (документів за секунду)
+    """
+    completed = [record for record in records.values() if record.get('status') == STATUS_COMPLETED and record.get('elapsed')]
+    documents = sum(record.get('matched', 0) for record in completed)
+    elapsed = sum(record['elapsed'] for record in completed)
+    return documents / elapsed if documents and elapsed else DEFAULT_DOCS_PER_SECOND
+
+def dry_run(client, migrations):
+    """
+    Кількість документів, яких торкнеться кожна міграція, та орієнтовний час
+    """
+    db = client[DATABASE_NAME]
+    docs_per_second = _measured_docs_per_second(get_migration_records(client))
+
+    print(f"\n🧪 ПРОБНИЙ ЗАПУСК (оцінка за {docs_per_second:.0f} документів/с):")
+    total = 0
+    for migration in migrations:
+        counts = {name: db[name].count_documents(migration['filter']()) for name in LEVEL_COLLECTIONS}
+        affected = sum(counts.values())
+        total += affected
+
+        print(f"\n  {migration['id']:04d} {migration['name']}: {migration['description']}")
+        for collection_name, count in counts.items():
+            if count:
+                print(f"    {collection_name}: {count}")
+        print(f"    Документів: {affected}, орієнтовно {affected / docs_per_second:.1f} с")
+
+    print(f"\n📊 Разом документів: {total}, орієнтовно {total / docs_per_second:.1f} с")
+    return total
+
+def _batch_boundary(collection, migration_filter, after_id, batch_size):
+    """
+    Останній _id пакета (None - залишок менший за пакет); передається лише один _id
+    """
+    id_filter = {'_id': {'$gt': after_id}} if after_id is not None else {}
+    boundary = list(
+        collection.find({**migration_filter, **id_filter}, {'_id': 1})
+        .sort('_id', 1).skip(batch_size - 1).limit(1)
+    )
+    return boundary[0]['_id'] if boundary else None
+
+def run_migration(client, migration, batch_size=MIGRATION_BATCH_SIZE):
+    """
+    Виконання міграції пакетами з контрольною точкою після кожного пакета
+    """
+    db = client[DATABASE_NAME]
+    migrations_collection = db[SCHEMA_MIGRATIONS_COLLECTION]
+
+    record = migrations_collection.find_one({'_id': migration['id']}) or {}
+    checkpoint = record.get('checkpoint') or {}
+    matched = record.get('matched', 0)
+    modified = record.get('modified', 0)
+    elapsed_before = record.get('elapsed', 0)
+
+    if checkpoint:
+        print(f"\n▶️  ПРОДОВЖЕННЯ МІГРАЦІЇ {migration['id']:04d} {migration['name']} з контрольної точки...")
+    else:
+        print(f"\n▶️  МІГРАЦІЯ {migration['id']:04d} {migration['name']}: {migration['description']}")
+
+    migrations_collection.update_one(
+        {'_id': migration['id']},
+        {
+            '$set': {'name': migration['name'], 'status': STATUS_RUNNING},
+            '$setOnInsert': {'started_at': datetime.now(timezone.utc)}
+        },
+        upsert=True
+    )
+
+    started = time.perf_counter()
+    for collection_name in LEVEL_COLLECTIONS:
+        collection_checkpoint = checkpoint.get(collection_name, {})
+        if collection_checkpoint.get('done'):
+            continue
+
+        collection = db[collection_name]
+        after_id = collection_checkpoint.get('last_id')
+
+        while True:
+            migration_filter = migration['filter']()
+            boundary = _batch_boundary(collection, migration_filter, after_id, batch_size)
+
+            id_range = {}
+            if after_id is not None:
+                id_range['$gt'] = after_id
+            if boundary is not None:
+                id_range['$lte'] = boundary
+            batch_filter = {**migration_filter, '_id': id_range} if id_range else migration_filter
+
+            result = collection.update_many(batch_filter, migration['update']())
+            matched += result.matched_count
+            modified += result.modified_count
+
+            done = boundary is None
+            after_id = boundary if boundary is not None else after_id
+            migrations_collection.update_one(
+                {'_id': migration['id']},
+                {'$set': {
+                    f'checkpoint.{collection_name}': {'last_id': after_id, 'done': done},
+                    'matched': matched,
+                    'modified': modified,
+                    'elapsed': elapsed_before + time.perf_counter() - started
+                }}
+            )
+
+            if done:
+                break
+            print(f"  ... {collection_name}: до {after_id}, оновлено {modified}")
+
+        print(f"  ✅ {collection_name}")
+
+    if migration.get('after'):
+        migration['after'](client)
+
+    elapsed = elapsed_before + time.perf_counter() - started
+    migrations_collection.update_one(
+        {'_id': migration['id']},
+        {'$set': {'status': STATUS_COMPLETED, 'completed_at': datetime.now(timezone.utc), 'elapsed': elapsed}}
+    )
+
+    print(f"✅ Міграцію {migration['id']:04d} завершено: знайдено {matched}, оновлено {modified} за {elapsed:.1f} с")
+    return modified
+
+def show_migrations(client):
+    """
+    Стан усіх міграцій
+    """
+    records = get_migration_records(client)
+
+    print("\n📜 МІГРАЦІЇ СХЕМИ:")
+    for migration in MIGRATIONS:
+        record = records.get(migration['id'], {})
+        status = record.get('status', STATUS_PENDING)
+        icon = {STATUS_COMPLETED: "✅", STATUS_RUNNING: "⏸️ "}.get(status, "⏳")
+        details = f", оновлено {record.get('modified', 0)}" if record else ""
+        print(f"  {icon} {migration['id']:04d} {migration['name']} ({status}{details})")
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Міграції схеми даних територій")
+    arg_parser.add_argument('--apply', action='store_true', help="Застосувати незавершені міграції")
+    arg_parser.add_argument('--dry-run', action='store_true', help="Оцінка кількості документів і часу без змін")
+    arg_parser.add_argument('--batch-size', type=int, default=MIGRATION_BATCH_SIZE,
+                            help=f"Розмір пакета ({MIGRATION_BATCH_SIZE})")
+    args = arg_parser.parse_args()
+
+    print("📜 МІГРАЦІЇ СХЕМИ ДАНИХ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        if args.dry_run:
+            dry_run(client, pending_migrations(client))
+        elif args.apply:
+            migrations = pending_migrations(client)
+            if not migrations:
+                print("✅ Усі міграції вже застосовано")
+            for migration in migrations:
+                run_migration(client, migration, args.batch_size)
+        else:
+            show_migrations(client)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Відкат імпорту Переліку за import_id
+Періоди сесії видаляються з усіх територій масовим $pull на сервері (власні
+та успадковані), після чого заново поширюються успадковані статуси та
+перераховуються поточні статуси, пласка колекція періодів і зведення; сесія
+позначається як відкочена
+Періоди інших імпортів не змінюються; перед відкатом зачеплені території
+архівуються (див. status_archive)
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+
+from status_periods import connect_to_mongodb, rebuild_status_periods, DATABASE_NAME
+from status_propagation import (
+    LEVEL_COLLECTIONS, HISTORY_FIELDS, INHERITED_HISTORY_FIELD, BULK_BATCH_SIZE, propagate_status_to_descendants
+)
+from status_current import recompute_current_status
+from status_rollups import build_status_rollups
+from status_normalize import coalesce_periods, PROVENANCE_FIELDS
+from status_archive import (
+    archive_status_data, ROLLBACK_ARCHIVE_REASON, IMPORT_SESSIONS_COLLECTION, ROLLED_BACK_STATUS
+)
+
+def _affected_filter(import_id):
+    """
+    Фільтр територій з періодами сесії (власними, успадкованими чи злитими)
+    """
+    conditions = [{f"{field}.import_id": import_id} for field in HISTORY_FIELDS + [INHERITED_HISTORY_FIELD]]
+    conditions += [{f"{field}.merged_from.import_id": import_id} for field in HISTORY_FIELDS]
+    return {"$or": conditions}
+
+def _split_merged_period(period, import_id):
+    """
+    Злитий нормалізацією період без джерел сесії: по періоду на кожне інше джерело
+    """
+    base = {field: value for field, value in period.items() if field not in PROVENANCE_FIELDS and field != 'merged_from'}
+    return [
+        {**base, **source}
+        for source in period['merged_from']
+        if source.get('import_id') != import_id
+    ]
+
+def split_merged_periods(client, import_id):
+    """
+    Злиті періоди, що містять джерела сесії, розділяються на решту джерел
+    (їх не можна видалити $pull, не втративши дані інших імпортів)
+    Повертає коди змінених територій
+    """
+    db = client[DATABASE_NAME]
+    changed_codes = set()
+
+    for collection_name in LEVEL_COLLECTIONS:
+        collection = db[collection_name]
+        operations = []
+
+        merged_filter = {"$or": [{f"{field}.merged_from.import_id": import_id} for field in HISTORY_FIELDS]}
+        for territory_doc in collection.find(merged_filter, {field: 1 for field in HISTORY_FIELDS}):
+            update = {}
+            for history_field in HISTORY_FIELDS:
+                periods = territory_doc.get(history_field) or []
+                if not any(source.get('import_id') == import_id
+                           for period in periods for source in period.get('merged_from') or []):
+                    continue
+
+                remaining = []
+                for period in periods:
+                    if period.get('merged_from'):
+                        remaining.extend(_split_merged_period(period, import_id))
+                    elif period.get('import_id') != import_id:
+                        remaining.append(period)
+                update[history_field] = coalesce_periods(remaining)
+
+            if update:
+                changed_codes.add(territory_doc['_id'])
+                operations.append(UpdateOne({'_id': territory_doc['_id']}, {'$set': update}))
+
+            if len(operations) >= BULK_BATCH_SIZE:
+                collection.bulk_write(operations, ordered=False)
+                operations = []
+
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+
+    return changed_codes
+
+def rollback_import(client, import_id):
+    """
+    Відкат сесії імпорту
+    Повертає статистику відкату або None, якщо сесію не знайдено чи вже відкочено
+    """
+    db = client[DATABASE_NAME]
+    sessions = db[IMPORT_SESSIONS_COLLECTION]
+
+    session = sessions.find_one({'import_id': import_id})
+    if not session:
+        print(f"❌ Сесію імпорту {import_id} не знайдено")
+        return None
+    if session.get('status') == ROLLED_BACK_STATUS:
+        print(f"ℹ️  Сесію імпорту {import_id} вже відкочено {session.get('rolled_back_at')}")
+        return None
+
+    print(f"\n↩️  ВІДКАТ ІМПОРТУ {import_id} - {session.get('document_name')} ({session.get('document_date')})...")
+
+    # Коди зачеплених територій потрібні для перерахунку поточного статусу
+    affected_codes = set()
+    for collection_name in LEVEL_COLLECTIONS:
+        affected_codes.update(
+            territory_doc['_id'] for territory_doc in db[collection_name].find(_affected_filter(import_id), {'_id': 1})
+        )
+
+    # Знімок зачеплених територій, з якого відкат можна скасувати
+    archive_name = archive_status_data(client, f'{ROLLBACK_ARCHIVE_REASON}:{import_id}', _affected_filter(import_id))
+
+    split_codes = split_merged_periods(client, import_id)
+
+    rolled_back_at = datetime.now(timezone.utc)
+    stats = {'territories': len(affected_codes), 'split_merged': len(split_codes), 'archive': archive_name,
+             'collections': {}}
+
+    pull = {field: {'import_id': import_id, 'merged_from': {'$exists': False}} for field in HISTORY_FIELDS}
+    pull[INHERITED_HISTORY_FIELD] = {'import_id': import_id}
+
+    for collection_name in LEVEL_COLLECTIONS:
+        collection = db[collection_name]
+        result = collection.update_many(
+            _affected_filter(import_id),
+            {'$pull': pull, '$set': {'last_status_update': rolled_back_at}}
+        )
+
+        # Історії, що стали порожніми, видаляються, щоб територія не рахувалась як "з історією"
+        for history_field in HISTORY_FIELDS + [INHERITED_HISTORY_FIELD]:
+            collection.update_many({history_field: {'$size': 0}}, {'$unset': {history_field: ""}})
+
+        stats['collections'][collection_name] = result.modified_count
+        print(f"  {collection_name}: оновлено {result.modified_count}")
+
+    # Успадковані періоди виводяться заново: після видалення власних періодів
+    # дитини знову стають видимими періоди батька з інших імпортів, а розділені
+    # злиті періоди дають нові успадковані копії
+    _, propagated_codes = propagate_status_to_descendants(client)
+    affected_codes |= propagated_codes
+
+    rebuild_status_periods(client)
+    recompute_current_status(client, affected_codes)
+    build_status_rollups(client)
+
+    sessions.update_one(
+        {'import_id': import_id},
+        {'$set': {'status': ROLLED_BACK_STATUS, 'status_before_rollback': session.get('status'),
+                  'rolled_back_at': rolled_back_at, 'rollback_stats': stats}}
+    )
+
+    print(f"✅ Відкочено: територій {stats['territories']}, розділено злитих {stats['split_merged']}")
+    print(f"🗄️  Попередні дані: python3 status_archive.py --restore {archive_name}")
+    return stats
+
+def show_import_sessions(client):
+    """
+    Короткий список сесій імпорту
+    """
+    db = client[DATABASE_NAME]
+    print("\n📚 СЕСІЇ ІМПОРТУ:")
+    for session in db[IMPORT_SESSIONS_COLLECTION].find().sort('import_start_time', -1):
+        print(f"  {session['import_id']} - {session.get('document_name')} ({session.get('document_date')}): "
+              f"{session.get('status')}")
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Відкат імпорту Переліку за import_id")
+    arg_parser.add_argument('import_id', nargs='?', help="import_id сесії (без аргументу - список сесій)")
+    arg_parser.add_argument('--yes', action='store_true', help="Без запиту підтвердження")
+    args = arg_parser.parse_args()
+
+    print("↩️  ВІДКАТ ІМПОРТУ ПЕРЕЛІКУ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        if not args.import_id:
+            show_import_sessions(client)
+            return
+
+        if not args.yes:
+            confirm = input(f"\n🤔 Видалити всі періоди імпорту {args.import_id}? (yes/no): ").strip().lower()
+            if confirm != 'yes':
+                print("❌ Операцію скасовано")
+                return
+
+        if rollback_import(client, args.import_id) is None:
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Архів даних статусів перед очищенням чи відкатом
+Поля статусів зачеплених територій копіюються на сервері ($merge) у колекцію
+архіву з позначкою часу; відновлення повертає їх тим самим способом, тож дані
+не проходять через клієнта
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+
+from status_periods import connect_to_mongodb, rebuild_status_periods, DATABASE_NAME, STATUS_CHANGED_FIELD
+from status_propagation import LEVEL_COLLECTIONS, propagate_status_to_descendants
+from status_current import recompute_current_status
+from status_rollups import build_status_rollups
+
+# Реєстр архівів і префікс колекцій архіву
+STATUS_ARCHIVES_COLLECTION = 'status_archives'
+ARCHIVE_COLLECTION_PREFIX = 'status_archive_'
+
+# Архіви відкату імпорту мають причину "rollback_import:<import_id>";
+# відновлення такого архіву повертає сесії імпорту попередній стан
+ROLLBACK_ARCHIVE_REASON = 'rollback_import'
+IMPORT_SESSIONS_COLLECTION = 'import_sessions'
+ROLLED_BACK_STATUS = 'rolled_back'
+
+# Поля, пов'язані зі статусами (архівуються та видаляються очищенням)
+STATUS_FIELDS = [
+    # Поточні статуси
+    "current_status",
+    "status_start_date",
+    "status_end_date",
+    "last_status_update",
+    "current_status_source",
+    "current_status_inherited_from",
+    "status_valid_until",
+    "current_status_computed_at",
+
+    # Окупація
+    "current_occupation_status",
+    "occupation_start_date",
+    "occupation_end_date",
+    "last_occupation_update",
+    "occupation_history",
+
+    # Бойові дії
+    "combat_history",
+
+    # Загальна історія статусів
+    "status_history",
+    "last_normalized_at",
+
+    # Успадковані статуси
+    "inherited_status_history",
+    "last_inherited_update"
+]
+
+def status_fields_filter():
+    """
+    Фільтр територій, що мають хоча б одне поле статусу
+    """
+    return {"$or": [{field: {"$exists": True}} for field in STATUS_FIELDS]}
+
+def archive_pipeline(collection_name, archive_name, territory_filter):
+    """
+    Pipeline знімка полів статусів колекції в архів
+    """
+    return [
+        {"$match": {"$and": [territory_filter, status_fields_filter()]}},
+        {
+            "$project": {
+                "_id": {"$concat": [collection_name, ":", "$_id"]},
+                "territory_code": "$_id",
+                "collection": {"$literal": collection_name},
+                **{field: 1 for field in STATUS_FIELDS}
+            }
+        },
+        {"$merge": {"into": archive_name, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+def restore_pipeline(collection_name):
+    """
+    Pipeline повернення полів статусів з архіву в колекцію рівня:
+    поточні поля статусів території замінюються архівними, а позначка зміни
+    оновлюється (архівний last_status_update старіший за позначку експорту)
+    """
+    return [
+        {"$match": {"collection": collection_name}},
+        {"$project": {"_id": "$territory_code", **{field: 1 for field in STATUS_FIELDS}}},
+        {
+            "$merge": {
+                "into": collection_name,
+                "on": "_id",
+                "whenMatched": [
+                    {"$unset": STATUS_FIELDS},
+                    {"$replaceWith": {"$mergeObjects": ["$$ROOT", "$$new"]}},
+                    {"$set": {STATUS_CHANGED_FIELD: "$$NOW"}}
+                ],
+                "whenNotMatched": "discard"
+            }
+        }
+    ]
+
+def archive_status_data(client, reason, territory_filter=None):
+    """
+    Знімок полів статусів територій (усіх або за фільтром) у нову колекцію архіву
+    Повертає назву колекції архіву
+    """
+    db = client[DATABASE_NAME]
+    created_at = datetime.now(timezone.utc)
+    archive_name = f"{ARCHIVE_COLLECTION_PREFIX}{created_at.strftime('%Y%m%dT%H%M%S%f')}"
+
+    print(f"\n🗄️  АРХІВУВАННЯ ДАНИХ СТАТУСІВ у {archive_name}...")
+
+    for collection_name in LEVEL_COLLECTIONS:
+        db[collection_name].aggregate(archive_pipeline(collection_name, archive_name, territory_filter or {}))
+
+    archive = db[archive_name]
+    counts = {name: archive.count_documents({'collection': name}) for name in LEVEL_COLLECTIONS}
+
+    db[STATUS_ARCHIVES_COLLECTION].insert_one({
+        '_id': archive_name,
+        'reason': reason,
+        'created_at': created_at,
+        'territories': sum(counts.values()),
+        'collections': counts,
+        'restored_at': None
+    })
+
+    print(f"✅ Заархівовано територій: {sum(counts.values())}")
+    return archive_name
+
+def _restore_import_session(client, reason):
+    """
+    Сесія імпорту, відкат якої скасовано відновленням, повертається у стан до відкату
+    """
+    prefix, _, import_id = reason.partition(':')
+    if prefix != ROLLBACK_ARCHIVE_REASON or not import_id:
+        return
+
+    sessions = client[DATABASE_NAME][IMPORT_SESSIONS_COLLECTION]
+    session = sessions.find_one({'import_id': import_id, 'status': ROLLED_BACK_STATUS})
+    if not session:
+        return
+
+    sessions.update_one(
+        {'import_id': import_id},
+        {
+            '$set': {'status': session.get('status_before_rollback') or 'completed',
+                     'rollback_restored_at': datetime.now(timezone.utc)},
+            '$unset': {'rolled_back_at': "", 'rollback_stats': "", 'status_before_rollback': ""}
+        }
+    )
+    print(f"↩️  Сесію імпорту {import_id} повернуто до стану до відкату")
+
+def restore_status_archive(client, archive_name):
+    """
+    Відновлення полів статусів з архіву з подальшою перебудовою похідних даних:
+    успадкованих статусів, пласкої колекції, поточних статусів і зведень
+    Повертає кількість відновлених територій або None, якщо архів не знайдено
+    """
+    db = client[DATABASE_NAME]
+    archive_info = db[STATUS_ARCHIVES_COLLECTION].find_one({'_id': archive_name})
+    if not archive_info:
+        print(f"❌ Архів {archive_name} не знайдено")
+        return None
+
+    print(f"\n♻️  ВІДНОВЛЕННЯ З АРХІВУ {archive_name} ({archive_info['reason']})...")
+
+    restored_codes = set(db[archive_name].distinct('territory_code'))
+
+    for collection_name in LEVEL_COLLECTIONS:
+        db[archive_name].aggregate(restore_pipeline(collection_name))
+
+    db[STATUS_ARCHIVES_COLLECTION].update_one(
+        {'_id': archive_name},
+        {'$set': {'restored_at': datetime.now(timezone.utc)}}
+    )
+
+    # Похідні дані виводяться з відновлених історій: успадковані періоди нащадків,
+    # пласка колекція, поточні статуси відновлених і зачеплених територій, зведення
+    _, propagated_codes = propagate_status_to_descendants(client)
+    rebuild_status_periods(client)
+    recompute_current_status(client, restored_codes | propagated_codes)
+    build_status_rollups(client)
+
+    _restore_import_session(client, archive_info['reason'])
+
+    print(f"✅ Відновлено територій: {archive_info['territories']}")
+    return archive_info['territories']
+
+def show_status_archives(client):
+    """
+    Список архівів статусів
+    """
+    db = client[DATABASE_NAME]
+    print("\n🗄️  АРХІВИ СТАТУСІВ:")
+
+    archives = list(db[STATUS_ARCHIVES_COLLECTION].find().sort('created_at', -1))
+    if not archives:
+        print("  Архівів немає")
+
+    for archive_info in archives:
+        restored = f", відновлено {archive_info['restored_at']:%Y-%m-%d %H:%M:%S}" if archive_info.get('restored_at') else ""
+        print(f"  {archive_info['_id']} - {archive_info['reason']}: {archive_info['territories']} територій"
+              f" ({archive_info['created_at']:%Y-%m-%d %H:%M:%S}{restored})")
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Архіви даних статусів")
+    arg_parser.add_argument('--restore', metavar='ARCHIVE', help="Відновити дані статусів з архіву")
+    arg_parser.add_argument('--snapshot', action='store_true', help="Заархівувати поточні дані статусів")
+    args = arg_parser.parse_args()
+
+    print("🗄️  АРХІВИ ДАНИХ СТАТУСІВ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        if args.restore:
+            if restore_status_archive(client, args.restore) is None:
+                sys.exit(1)
+        elif args.snapshot:
+            archive_status_data(client, 'manual_snapshot')
+        else:
+            show_status_archives(client)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
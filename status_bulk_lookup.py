@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Масовий пошук статусів для пар (код території, дата)
+Пари зіставляються з періодами рушія статусів векторно: для кожної пари
+беруться періоди її території (разом з успадкованими від області, району,
+громади) і перевіряються однією маскою по всьому пакету
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+import sys
+import time
+from datetime import date, datetime
+
+from status_engine import get_status_engine
+from status_periods import connect_to_mongodb
+
+CODE_COLUMN = 'territory_code'
+DATE_COLUMN = 'date'
+
+# Роздільник кількох значень в одній клітинці результату
+VALUES_SEPARATOR = '; '
+
+def _territory_index(engine):
+    """
+    Допоміжні масиви рушія для пошуку (кешуються до зміни версії даних):
+    порядок періодів за територією, межі груп та коди батьків успадкованих періодів
+    """
+    cached = getattr(engine, '_bulk_lookup_index', None)
+    if cached is not None and cached['version'] == engine.version:
+        return cached
+
+    order = np.argsort(engine.territory_idx, kind='stable')
+
+    # Територія-джерело успадкованого періоду як індекс у списку кодів (-1 - власний період)
+    ancestor_codes = []
+    ancestor_position = {}
+    ancestors = np.full(len(engine.period_details), -1, dtype=np.int64)
+    for period, (own, details) in enumerate(zip(engine.own, engine.period_details)):
+        ancestor = None if own else details.get('inherited_from')
+        if ancestor:
+            if ancestor not in ancestor_position:
+                ancestor_position[ancestor] = len(ancestor_codes)
+                ancestor_codes.append(ancestor)
+            ancestors[period] = ancestor_position[ancestor]
+
+    cached = engine._bulk_lookup_index = {
+        'version': engine.version,
+        'order': order,
+        'bounds': np.searchsorted(engine.territory_idx[order], np.arange(len(engine.codes) + 1)),
+        'ancestors': ancestors,
+        'ancestor_codes': np.array(ancestor_codes, dtype=object)
+    }
+    return cached
+
+def parse_lookup_dates(values):
+    """
+    Дати пакета: datetime/date, ISO (РРРР-ММ-ДД) або ДД.ММ.РРРР; нерозпізнані - NaT
+    Рядки спершу розбираються строгим ISO форматом, ДД.ММ.РРРР - лише для решти,
+    тож ISO дата ніколи не читається як день-місяць
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(pd.Series(values))
+
+    values = pd.Series(values, dtype=object)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    # Справжні дати (зокрема date32 з Parquet) перетворюються напряму
+    is_date = values.map(lambda value: isinstance(value, (date, datetime, pd.Timestamp)))
+    if is_date.any():
+        parsed[is_date] = pd.to_datetime(values[is_date])
+
+    text = values[~is_date & values.notna()].astype(str).str.strip()
+    iso = pd.to_datetime(text, format='%Y-%m-%d', errors='coerce')
+    parsed[iso.index] = iso
+
+    rest = text[iso.isna()]
+    if len(rest):
+        parsed[rest.index] = pd.to_datetime(rest, format='%d.%m.%Y', errors='coerce')
+
+    return parsed
+
+def bulk_status_lookup(engine, codes, dates, include_inherited=True):
+    """
+    Статуси для кожної пари (код, дата)
+    Повертає DataFrame у порядку вхідних пар: territory_code, date, statuses,
+    inherited_from (коди територій, від яких успадковано статус), status_count
+    """
+    codes = pd.Series(codes, dtype=object).astype(str).str.strip().reset_index(drop=True)
+    dates = parse_lookup_dates(dates).reset_index(drop=True)
+    pair_count = len(codes)
+
+    territory = codes.map(engine.code_index).fillna(-1).astype(np.int64).to_numpy()
+    valid_date = dates.notna().to_numpy()
+    moments = dates.to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+    index = _territory_index(engine)
+    order, bounds = index['order'], index['bounds']
+    known = (territory >= 0) & valid_date
+    counts = np.zeros(pair_count, dtype=np.int64)
+    counts[known] = bounds[territory[known] + 1] - bounds[territory[known]]
+
+    # Розгортання: рядок на кожну пару (пара, період її території)
+    pairs = np.repeat(np.arange(pair_count), counts)
+    offsets = np.arange(len(pairs)) - np.repeat(np.cumsum(counts) - counts, counts)
+    periods = order[bounds[territory[pairs]] + offsets]
+
+    active = (engine.starts[periods] <= moments[pairs]) & (engine.ends[periods] >= moments[pairs])
+    if not include_inherited:
+        active &= engine.own[periods]
+
+    pairs, periods = pairs[active], periods[active]
+
+    # Набір статусів пари як бітова маска; підписи будуються лише для унікальних масок
+    status_masks = np.zeros(pair_count, dtype=np.int64)
+    np.bitwise_or.at(status_masks, pairs, np.left_shift(1, engine.status_idx[periods].astype(np.int64)))
+    unique_masks, mask_position = np.unique(status_masks, return_inverse=True)
+    ordered_statuses = sorted(range(len(engine.statuses)), key=lambda status: engine.statuses[status] or '')
+    mask_statuses = [
+        [engine.statuses[status] for status in ordered_statuses if mask >> status & 1]
+        for mask in unique_masks
+    ]
+    statuses = np.array([VALUES_SEPARATOR.join(values) for values in mask_statuses], dtype=object)[mask_position]
+    status_count = np.array([len(values) for values in mask_statuses], dtype=np.int64)[mask_position]
+
+    # Коди територій, від яких успадковано статус (зазвичай одна на пару)
+    inherited_from = np.full(pair_count, '', dtype=object)
+    ancestors = index['ancestors'][periods]
+    inherited = ancestors >= 0
+    if inherited.any():
+        ancestor_count = len(index['ancestor_codes'])
+        keys = np.unique(pairs[inherited] * ancestor_count + ancestors[inherited])
+        key_pairs, key_ancestors = keys // ancestor_count, keys % ancestor_count
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = key_pairs[1:] != key_pairs[:-1]
+        inherited_from[key_pairs[first]] = index['ancestor_codes'][key_ancestors[first]]
+        for key in np.flatnonzero(~first):
+            inherited_from[key_pairs[key]] += VALUES_SEPARATOR + index['ancestor_codes'][key_ancestors[key]]
+
+    result = pd.DataFrame({CODE_COLUMN: codes, DATE_COLUMN: dates})
+    result['statuses'] = statuses
+    result['inherited_from'] = inherited_from
+    result['status_count'] = status_count
+    result['valid_date'] = valid_date
+    return result
+
+def read_pairs(input_file, code_column=CODE_COLUMN, date_column=DATE_COLUMN):
+    """
+    Читання пакета пар з CSV або Parquet
+    """
+    if input_file.lower().endswith('.parquet'):
+        frame = pd.read_parquet(input_file, columns=[code_column, date_column])
+    else:
+        frame = pd.read_csv(input_file, usecols=[code_column, date_column], dtype={code_column: str})
+    return frame[code_column], frame[date_column]
+
+def write_results(result, output_file):
+    """
+    Збереження результату в CSV або Parquet (за розширенням файлу)
+    """
+    if output_file.lower().endswith('.parquet'):
+        result.to_parquet(output_file, index=False)
+    else:
+        result.to_csv(output_file, index=False, encoding='utf-8', date_format='%Y-%m-%d')
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Масовий пошук статусів для пар (код території, дата)")
+    arg_parser.add_argument('input', help="Файл пар (.csv або .parquet)")
+    arg_parser.add_argument('-o', '--output', default='status_lookup_result.csv',
+                            help="Файл результату (.csv або .parquet), за замовчуванням status_lookup_result.csv")
+    arg_parser.add_argument('--code-column', default=CODE_COLUMN, help=f"Колонка з кодом території ({CODE_COLUMN})")
+    arg_parser.add_argument('--date-column', default=DATE_COLUMN, help=f"Колонка з датою ({DATE_COLUMN})")
+    arg_parser.add_argument('--own-only', action='store_true', help="Лише власні статуси, без успадкованих")
+    args = arg_parser.parse_args()
+
+    print("📦 МАСОВИЙ ПОШУК СТАТУСІВ")
+    print("=" * 60)
+
+    try:
+        codes, dates = read_pairs(args.input, args.code_column, args.date_column)
+    except Exception as e:
+        print(f"❌ Помилка читання {args.input}: {e}")
+        sys.exit(1)
+
+    client = connect_to_mongodb()
+
+    try:
+        engine = get_status_engine(client)
+
+        started = time.perf_counter()
+        result = bulk_status_lookup(engine, codes, dates, include_inherited=not args.own_only)
+        elapsed = time.perf_counter() - started
+
+        write_results(result, args.output)
+
+        print(f"✅ Пар: {len(result)}, зі статусом: {int((result['status_count'] > 0).sum())}, "
+              f"нерозпізнаних дат: {int((~result['valid_date']).sum())}")
+        print(f"⏱️  Час пошуку: {elapsed:.2f} с")
+        print(f"📄 Результат збережено в {args.output}")
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Кеш результатів запитів "статус на дату"
+Ключ - (бекенд запиту, дата, фільтр статусу, версія даних статусів); записи старих версій
+відкидаються, щойно імпорт чи очищення змінює версію
+Кеш обмежений за кількістю записів (витісняється найдавніше використаний)
+і за бажанням зберігається у локальний файл між запусками
+"""
+
+import atexit
+import os
+import pickle
+from collections import OrderedDict
+
+from status_periods import get_data_version
+
+STATUS_CACHE_CONFIG = {
+    'max_entries': 64,
+    'persist': False,
+    'cache_file': 'status_query_cache.pkl'
+}
+
+class StatusQueryCache:
+    """
+    LRU-кеш результатів з лічильниками влучань
+    """
+
+    def __init__(self, max_entries=STATUS_CACHE_CONFIG['max_entries'], cache_file=None):
+        self.max_entries = max_entries
+        self.cache_file = cache_file
+        self.version = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        if cache_file:
+            self.load()
+
+    def _sync_version(self, version):
+        """
+        Скидання записів, якщо версія даних змінилась
+        """
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        """
+        Результат з кешу або None
+        """
+        self._sync_version(version)
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key, version, value):
+        """
+        Збереження результату з витісненням найдавніше використаних записів
+        """
+        self._sync_version(version)
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Статистика кешу
+        """
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / requests if requests else 0.0
+        }
+
+    def load(self):
+        """
+        Завантаження записів з локального файлу
+        """
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, 'rb') as f:
+                payload = pickle.load(f)
+            self.version = payload['version']
+            self.entries = OrderedDict(payload['entries'])
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        except Exception as e:
+            print(f"⚠️  Не вдалося прочитати кеш {self.cache_file}: {e}")
+
+    def save(self):
+        """
+        Збереження записів у локальний файл
+        """
+        if not self.cache_file:
+            return
+
+        with open(self.cache_file, 'wb') as f:
+            pickle.dump({'version': self.version, 'entries': list(self.entries.items())}, f)
+
+# Кеш процесу
+_cache = None
+
+def get_status_cache():
+    """
+    Кеш процесу, створений за STATUS_CACHE_CONFIG
+    """
+    global _cache
+    if _cache is None:
+        cache_file = STATUS_CACHE_CONFIG['cache_file'] if STATUS_CACHE_CONFIG['persist'] else None
+        _cache = StatusQueryCache(STATUS_CACHE_CONFIG['max_entries'], cache_file)
+        if cache_file:
+            atexit.register(_cache.save)
+    return _cache
+
+def cached_status_query(client, query_date, status_value, compute, backend=''):
+    """
+    Результат запиту "статус на дату" з кешу або обчислений через compute()
+    Бекенд входить у ключ, бо різні бекенди обчислюють результат незалежно
+    Результат спільний для всіх викликів з тим самим ключем, тож його не слід змінювати
+    """
+    cache = get_status_cache()
+    version = get_data_version(client)
+    key = (backend, query_date.isoformat(), status_value or '')
+
+    result = cache.get(key, version)
+    if result is None:
+        result = compute()
+        cache.put(key, version, result)
+
+    return result
+
+def print_cache_stats():
+    """
+    Виведення статистики кешу
+    """
+    stats = get_status_cache().stats()
+    print(f"Кеш запитів: {stats['entries']}/{stats['max_entries']} записів, версія даних {stats['version']}")
+    print(f"  Влучань: {stats['hits']}, промахів: {stats['misses']} ({stats['hit_rate']:.0%})")
+    print(f"  Витіснено: {stats['evictions']}, скидань через нову версію: {stats['invalidations']}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Підтримка полів поточного статусу територій
+current_status, status_start_date та status_end_date виводяться з періодів,
+активних на поточний момент, а не з періоду, записаного останнім
+Перерахунок виконується для змінених територій після імпорту чи редагування
+та плановим проходом для територій, чий статус міг закінчитись
+"""
+
+import argparse
+import pymongo
+from pymongo import UpdateOne
+from datetime import datetime
+
+from status_periods import connect_to_mongodb, DATABASE_NAME, SOURCE_OWN, SOURCE_INHERITED
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS, INHERITED_HISTORY_FIELD, BULK_BATCH_SIZE
+
+# Пріоритет статусів, якщо на дату активні кілька періодів (від найвищого)
+STATUS_PRIORITY = [
+    "Тимчасово окуповані території",
+    "2. Території активних бойових дій",
+    "3. Території активних бойових дій, на яких функціонують державні електронні інформаційні ресурси",
+    "1. Території можливих бойових дій"
+]
+
+# Поля поточного статусу, що підтримуються перерахунком
+CURRENT_STATUS_FIELDS = [
+    'current_status',
+    'status_start_date',
+    'status_end_date',
+    'current_status_source',
+    'current_status_inherited_from',
+    'status_valid_until'
+]
+
+CODES_BATCH_SIZE = 1000
+
+def _status_rank(status):
+    """
+    Ранг статусу (менше - вищий пріоритет)
+    """
+    return STATUS_PRIORITY.index(status) if status in STATUS_PRIORITY else len(STATUS_PRIORITY)
+
+def _is_active(period, now):
+    """
+    Чи активний період на момент now
+    """
+    start_date = period.get('start_date')
+    end_date = period.get('end_date')
+    return start_date is not None and start_date <= now and (end_date is None or end_date >= now)
+
+def compute_current_status(territory_doc, now):
+    """
+    Поточний статус території з її власних періодів, а якщо власних активних немає -
+    з успадкованих; повертає словник полів CURRENT_STATUS_FIELDS
+    status_valid_until - найближчий момент, коли статус може змінитись
+    (кінець активного періоду або початок майбутнього)
+    """
+    own_periods = [period for field in HISTORY_FIELDS for period in territory_doc.get(field) or []]
+    inherited_periods = territory_doc.get(INHERITED_HISTORY_FIELD) or []
+
+    current = {field: None for field in CURRENT_STATUS_FIELDS}
+    change_moments = []
+
+    for source, periods in ((SOURCE_OWN, own_periods), (SOURCE_INHERITED, inherited_periods)):
+        active = [period for period in periods if _is_active(period, now)]
+
+        change_moments.extend(
+            period['start_date'] for period in periods
+            if period.get('start_date') is not None and period['start_date'] > now
+        )
+        change_moments.extend(period['end_date'] for period in active if period.get('end_date') is not None)
+
+        if active and current['current_status'] is None:
+            chosen = min(active, key=lambda period: (_status_rank(period.get('status')), -period['start_date'].timestamp()))
+            current.update({
+                'current_status': chosen.get('status'),
+                'status_start_date': chosen.get('start_date'),
+                'status_end_date': chosen.get('end_date'),
+                'current_status_source': source,
+                'current_status_inherited_from': chosen.get('inherited_from') if source == SOURCE_INHERITED else None
+            })
+
+    current['status_valid_until'] = min(change_moments) if change_moments else None
+    return current
+
+def _current_status_update(territory_doc, current, now):
+    """
+    Операція оновлення або None, якщо поля вже актуальні
+    """
+    if all(territory_doc.get(field) == current[field] for field in CURRENT_STATUS_FIELDS):
+        return None
+
+    values = {field: value for field, value in current.items() if value is not None}
+    cleared = {field: "" for field, value in current.items() if value is None and field in territory_doc}
+
+    update = {'$set': {**values, 'current_status_computed_at': now}}
+    if cleared:
+        update['$unset'] = cleared
+
+    return UpdateOne({'_id': territory_doc['_id']}, update)
+
+def _recompute(client, filters, now):
+    """
+    Перерахунок для документів, що відповідають фільтру кожної колекції
+    """
+    db = client[DATABASE_NAME]
+    projection = {field: 1 for field in HISTORY_FIELDS + [INHERITED_HISTORY_FIELD] + CURRENT_STATUS_FIELDS}
+
+    updated = 0
+    for collection_name in LEVEL_COLLECTIONS:
+        collection = db[collection_name]
+        operations = []
+
+        for collection_filter in filters:
+            for territory_doc in collection.find(collection_filter, projection):
+                operation = _current_status_update(territory_doc, compute_current_status(territory_doc, now), now)
+                if operation:
+                    operations.append(operation)
+
+                if len(operations) >= BULK_BATCH_SIZE:
+                    updated += collection.bulk_write(operations, ordered=False).modified_count
+                    operations = []
+
+        if operations:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+
+        collection.create_index([('current_status', pymongo.ASCENDING)])
+        collection.create_index([('status_valid_until', pymongo.ASCENDING)])
+
+    return updated
+
+def recompute_current_status(client, codes=None, now=None):
+    """
+    Перерахунок поточного статусу для вказаних кодів (або для всіх територій)
+    """
+    now = now or datetime.now()
+
+    if codes is None:
+        filters = [{}]
+    else:
+        codes = sorted(set(codes))
+        filters = [
+            {'_id': {'$in': codes[i:i + CODES_BATCH_SIZE]}}
+            for i in range(0, len(codes), CODES_BATCH_SIZE)
+        ]
+
+    updated = _recompute(client, filters, now)
+    scope = "усіх територій" if codes is None else f"{len(codes)} територій"
+    print(f"🕒 Поточний статус перераховано для {scope}: оновлено {updated}")
+    return updated
+
+def recompute_expired_current_status(client, now=None):
+    """
+    Плановий прохід: перерахунок територій, у яких закінчився активний період
+    або настав початок майбутнього
+    """
+    now = now or datetime.now()
+    updated = _recompute(client, [{'status_valid_until': {'$lte': now}}], now)
+    print(f"🕒 Перераховано територій із застарілим поточним статусом: оновлено {updated}")
+    return updated
+
+def get_territories_with_current_status(client, status_value=None):
+    """
+    Території з поточним статусом (індексований фільтр по current_status)
+    """
+    db = client[DATABASE_NAME]
+    status_filter = {'current_status': status_value} if status_value else {'current_status': {'$exists': True}}
+    projection = {'name': 1, 'category': 1, **{field: 1 for field in CURRENT_STATUS_FIELDS}}
+
+    territories = []
+    for collection_name in LEVEL_COLLECTIONS:
+        for territory_doc in db[collection_name].find(status_filter, projection):
+            territory_doc['collection'] = collection_name
+            territories.append(territory_doc)
+
+    return territories
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Перерахунок поточного статусу територій")
+    arg_parser.add_argument('--full', action='store_true', help="Повний перерахунок усіх територій")
+    args = arg_parser.parse_args()
+
+    print("🕒 ПЕРЕРАХУНОК ПОТОЧНОГО СТАТУСУ ТЕРИТОРІЙ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        if args.full:
+            recompute_current_status(client)
+        else:
+            recompute_expired_current_status(client)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Обчислювальний рушій статусів у пам'яті
+Один раз завантажує всі періоди з колекції status_periods у відсортовані масиви NumPy
+і відповідає на запити "статус на дату" бінарним пошуком та векторною маскою
+Дані перечитуються, коли змінюється версія даних статусів
+"""
+
+import numpy as np
+from datetime import datetime
+import sys
+import time
+
+from status_periods import (
+    connect_to_mongodb, get_data_version, DATABASE_NAME, STATUS_PERIODS_COLLECTION,
+    ACTIVE_PERIOD_FIELDS, SOURCE_OWN
+)
+
+# Відкритий період (без дати кінця) триває до кінця шкали
+OPEN_END = np.iinfo(np.int64).max
+
+# Період без дати початку триває від початку шкали
+OPEN_START = np.iinfo(np.int64).min
+
+def to_timestamp(value):
+    """
+    Перетворення дати (datetime/date/рядок ISO) у секунди епохи для порівнянь у масивах
+    """
+    return np.datetime64(value, 's').astype(np.int64)
+
+class StatusEngine:
+    """
+    Індекс періодів статусів у пам'яті
+
+    Території нумеруються цілими індексами; кожен період зберігається як рядок
+    паралельних масивів, відсортованих за датою початку:
+    territory_idx, status_idx, starts, ends, own
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.version = None
+        self.loaded_at = None
+
+        # Довідники територій (індекс -> атрибут)
+        self.codes = []
+        self.code_index = {}
+        self.names = []
+        self.categories = []
+        self.levels = []
+        self.level_ranks = np.empty(0, dtype=np.int8)
+
+        # Довідник статусів (індекс -> значення)
+        self.statuses = []
+        self.status_index = {}
+
+        # Масиви періодів
+        self.territory_idx = np.empty(0, dtype=np.int32)
+        self.status_idx = np.empty(0, dtype=np.int16)
+        self.starts = np.empty(0, dtype=np.int64)
+        self.ends = np.empty(0, dtype=np.int64)
+        self.own = np.empty(0, dtype=bool)
+        self.period_details = []
+
+    def load(self):
+        """
+        Повне завантаження періодів з колекції status_periods
+        """
+        started = time.perf_counter()
+        version = get_data_version(self.client)
+        collection = self.client[DATABASE_NAME][STATUS_PERIODS_COLLECTION]
+
+        projection = {
+            '_id': 0,
+            'territory_code': 1, 'territory_name': 1, 'category': 1, 'level': 1, 'level_rank': 1,
+            **{field: 1 for field in ACTIVE_PERIOD_FIELDS}
+        }
+
+        codes, code_index, names, categories, levels, level_ranks = [], {}, [], [], [], []
+        statuses, status_index = [], {}
+        territory_idx, status_idx, starts, ends, own, details = [], [], [], [], [], []
+
+        # Періоди без дати початку активні від початку шкали, як і в запиті до бази
+        for period in collection.find({}, projection):
+            code = period['territory_code']
+            index = code_index.get(code)
+            if index is None:
+                index = code_index[code] = len(codes)
+                codes.append(code)
+                names.append(period.get('territory_name'))
+                categories.append(period.get('category') or 'Невідома')
+                levels.append(period['level'])
+                level_ranks.append(period['level_rank'])
+
+            status = period.get('status')
+            if status not in status_index:
+                status_index[status] = len(statuses)
+                statuses.append(status)
+
+            territory_idx.append(index)
+            status_idx.append(status_index[status])
+            starts.append(to_timestamp(period['start_date']) if period.get('start_date') else OPEN_START)
+            ends.append(to_timestamp(period['end_date']) if period.get('end_date') else OPEN_END)
+            own.append(period.get('source') == SOURCE_OWN)
+            details.append({field: period.get(field) for field in ACTIVE_PERIOD_FIELDS})
+
+        order = np.argsort(np.array(starts, dtype=np.int64), kind='stable')
+
+        self.codes, self.code_index = codes, code_index
+        self.names, self.categories, self.levels = names, categories, levels
+        self.level_ranks = np.array(level_ranks, dtype=np.int8)
+        self.statuses, self.status_index = statuses, status_index
+        self.territory_idx = np.array(territory_idx, dtype=np.int32)[order]
+        self.status_idx = np.array(status_idx, dtype=np.int16)[order]
+        self.starts = np.array(starts, dtype=np.int64)[order]
+        self.ends = np.array(ends, dtype=np.int64)[order]
+        self.own = np.array(own, dtype=bool)[order]
+        self.period_details = [details[i] for i in order]
+
+        self.version = version
+        self.loaded_at = datetime.now()
+
+        elapsed = time.perf_counter() - started
+        print(f"🧮 Рушій статусів: завантажено {len(self.starts)} періодів для "
+              f"{len(self.codes)} територій (версія даних {version}, {elapsed:.2f} с)")
+        return self
+
+    def ensure_current(self):
+        """
+        Перезавантаження, якщо версія даних у базі змінилась
+        """
+        if self.version is None or get_data_version(self.client) != self.version:
+            self.load()
+        return self
+
+    def active_period_indices(self, query_date, status_value=None, include_inherited=False):
+        """
+        Індекси періодів, активних на дату
+        Бінарний пошук відсікає періоди, що починаються пізніше дати,
+        решта фільтрується векторною маскою по даті кінця, статусу та джерелу
+        """
+        moment = to_timestamp(query_date)
+        candidates = np.searchsorted(self.starts, moment, side='right')
+
+        mask = self.ends[:candidates] >= moment
+
+        if status_value is not None:
+            status = self.status_index.get(status_value)
+            if status is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.status_idx[:candidates] == status
+
+        if not include_inherited:
+            mask &= self.own[:candidates]
+
+        return np.flatnonzero(mask)
+
+    def active_territory_indices(self, query_date, status_value=None, include_inherited=False):
+        """
+        Унікальні індекси територій з активними на дату періодами
+        """
+        periods = self.active_period_indices(query_date, status_value, include_inherited)
+        return np.unique(self.territory_idx[periods])
+
+    def status_on_date(self, query_date, status_value=None, include_inherited=False):
+        """
+        Відповідь у форматі get_territory_status_on_date
+        """
+        periods = self.active_period_indices(query_date, status_value, include_inherited)
+
+        territories = {}
+        for period in periods:
+            index = int(self.territory_idx[period])
+            territory = territories.get(index)
+            if territory is None:
+                territory = territories[index] = {
+                    'code': self.codes[index],
+                    'name': self.names[index],
+                    'category': self.categories[index],
+                    'collection': self.levels[index],
+                    'active_periods': []
+                }
+            territory['active_periods'].append(dict(self.period_details[period]))
+
+        ordered = sorted(territories, key=lambda index: (self.level_ranks[index], self.codes[index]))
+        return [territories[index] for index in ordered]
+
+    def status_delta(self, first_date, second_date, status_value=None, include_inherited=False):
+        """
+        Зміни статусів між двома датами за один векторний прохід по періодах
+        Повертає словник з ключами entered/exited/changed: території, що отримали
+        статус, втратили його або змінили набір статусів, разом з періодами,
+        активними лише на одну з дат (саме вони спричинили зміну)
+        """
+        first, second = to_timestamp(first_date), to_timestamp(second_date)
+        candidates = np.searchsorted(self.starts, max(first, second), side='right')
+
+        starts = self.starts[:candidates]
+        ends = self.ends[:candidates]
+        selected = np.ones(candidates, dtype=bool) if include_inherited else self.own[:candidates].copy()
+
+        if status_value is not None:
+            status = self.status_index.get(status_value)
+            if status is None:
+                return {'entered': [], 'exited': [], 'changed': []}
+            selected &= self.status_idx[:candidates] == status
+
+        on_first = selected & (starts <= first) & (ends >= first)
+        on_second = selected & (starts <= second) & (ends >= second)
+
+        # Належність (територія, статус) на кожну дату
+        territory_idx = self.territory_idx[:candidates]
+        status_idx = self.status_idx[:candidates]
+        shape = (len(self.codes), max(len(self.statuses), 1))
+        before = np.zeros(shape, dtype=bool)
+        after = np.zeros(shape, dtype=bool)
+        before[territory_idx[on_first], status_idx[on_first]] = True
+        after[territory_idx[on_second], status_idx[on_second]] = True
+
+        had_status = before.any(axis=1)
+        has_status = after.any(axis=1)
+        kinds = {
+            'entered': has_status & ~had_status,
+            'exited': had_status & ~has_status,
+            'changed': had_status & has_status & (before != after).any(axis=1)
+        }
+
+        # Періоди, активні лише на одну з дат
+        driving = np.flatnonzero(on_first ^ on_second)
+        driving_by_territory = {}
+        for period in driving:
+            driving_by_territory.setdefault(int(territory_idx[period]), []).append(dict(self.period_details[period]))
+
+        delta = {}
+        for kind, mask in kinds.items():
+            indices = sorted(np.flatnonzero(mask), key=lambda index: (self.level_ranks[index], self.codes[index]))
+            delta[kind] = [
+                {
+                    'code': self.codes[index],
+                    'name': self.names[index],
+                    'category': self.categories[index],
+                    'collection': self.levels[index],
+                    'statuses_before': [self.statuses[status] for status in np.flatnonzero(before[index])],
+                    'statuses_after': [self.statuses[status] for status in np.flatnonzero(after[index])],
+                    'driving_periods': driving_by_territory.get(int(index), [])
+                }
+                for index in indices
+            ]
+
+        return delta
+
+# Рушії, спільні для всіх запитів одного клієнта
+_engines = {}
+
+def get_status_engine(client):
+    """
+    Рушій для клієнта MongoDB, актуальний щодо поточної версії даних
+    """
+    engine = _engines.get(id(client))
+    if engine is None or engine.client is not client:
+        engine = _engines[id(client)] = StatusEngine(client)
+    return engine.ensure_current()
+
+def get_status_on_date_from_engine(client, query_date, status_value=None, include_inherited=False):
+    """
+    Статус на дату через рушій у пам'яті (бекенд для get_territory_status_on_date)
+    """
+    return get_status_engine(client).status_on_date(query_date, status_value, include_inherited)
+
+def get_status_delta_from_engine(client, first_date, second_date, status_value=None, include_inherited=False):
+    """
+    Зміни статусів між двома датами через рушій у пам'яті
+    """
+    return get_status_engine(client).status_delta(first_date, second_date, status_value, include_inherited)
+
+def main():
+    """Головна функція"""
+    print("🧮 РУШІЙ СТАТУСІВ У ПАМ'ЯТІ")
+    print("=" * 60)
+
+    if len(sys.argv) < 2:
+        print("Використання: python3 status_engine.py ДД.ММ.РРРР [статус]")
+        sys.exit(1)
+
+    try:
+        query_date = datetime.strptime(sys.argv[1], '%d.%m.%Y')
+    except ValueError:
+        print(f"❌ Невірний формат дати: {sys.argv[1]}")
+        sys.exit(1)
+
+    status_value = sys.argv[2] if len(sys.argv) > 2 else None
+
+    client = connect_to_mongodb()
+
+    try:
+        engine = get_status_engine(client)
+
+        started = time.perf_counter()
+        territories = engine.status_on_date(query_date, status_value)
+        elapsed = time.perf_counter() - started
+
+        print(f"\n🔍 Території зі статусом на {query_date.strftime('%d.%m.%Y')}: {len(territories)} "
+              f"({elapsed * 1000:.1f} мс)")
+        for territory in territories:
+            statuses = ', '.join(sorted({period['status'] for period in territory['active_periods']}))
+            print(f"  • {territory['name']} ({territory['category']}): {statuses}")
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковий експорт періодів статусів територій
+Документи читаються курсором пакетами з проєкцією лише потрібних полів,
+рядки формуються генератором і одразу дописуються у файл, тож пам'ять
+не залежить від обсягу історії
+Колонковий режим пише класифікатор і пласку колекцію періодів у Parquet
+групами рядків: типізовані дати, словникові статуси й категорії, коди як int64
+Інкрементальний режим пише лише території, змінені після позначки часу
+попереднього запуску, окремим файлом змін з маніфестом
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import pymongo
+
+from status_periods import (
+    connect_to_mongodb, has_status_periods, get_data_version, DATABASE_NAME, STATUS_PERIODS_COLLECTION,
+    STATUS_CHANGED_FIELD
+)
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS
+
+# Колонки CSV експорту
+EXPORT_COLUMNS = [
+    'territory_name',
+    'territory_code',
+    'category',
+    'collection',
+    'status',
+    'start_date',
+    'end_date',
+    'source_document',
+    'updated_at'
+]
+
+# Поля періоду, що потрапляють в експорт
+EXPORT_PERIOD_FIELDS = ['status', 'start_date', 'end_date', 'source_document', 'updated_at']
+
+EXPORT_BATCH_SIZE = 1000
+PROGRESS_EVERY = 100000
+
+# Колонковий експорт: файли, розмір групи рядків і схеми
+PARQUET_FILES = {
+    'territories': 'katottg_territories.parquet',
+    'periods': 'katottg_status_periods.parquet'
+}
+ROW_GROUP_SIZE = 100000
+
+# Колонки та їхні типи; схеми pyarrow будуються лише під час колонкового експорту,
+# тож CSV-експорт (і модулі, що його імпортують) працює без pyarrow
+# code - код КАТОТТГ як int64, dictionary - рядок зі словниковим кодуванням
+TERRITORY_COLUMNS = [
+    ('code', 'code'),
+    ('parent_code', 'code'),
+    ('name', 'string'),
+    ('category', 'dictionary'),
+    ('level', 'dictionary')
+]
+
+PERIOD_COLUMNS = [
+    ('territory_code', 'code'),
+    ('level', 'dictionary'),
+    ('category', 'dictionary'),
+    ('history_field', 'dictionary'),
+    ('source', 'dictionary'),
+    ('inherited_from', 'code'),
+    ('status', 'dictionary'),
+    ('start_date', 'timestamp'),
+    ('end_date', 'timestamp'),
+    ('source_document', 'dictionary'),
+    ('document_date', 'date'),
+    ('import_id', 'dictionary')
+]
+
+# Інкрементальний експорт: каталог, файл стану та поля позначки зміни території
+INCREMENTAL_EXPORT_DIR = 'exports'
+INCREMENTAL_STATE_FILE = 'status_export_state.json'
+CHANGE_FIELDS = ['last_status_update', 'last_normalized_at', STATUS_CHANGED_FIELD]
+
+# Код КАТОТТГ: UA + 17 цифр; у колонковому експорті зберігаються лише цифри
+CODE_PATTERN = re.compile(r'UA(\d{17})')
+
+def _format_date(value, date_format='%d.%m.%Y'):
+    """
+    Дата у форматі експорту (порожній рядок для відсутньої)
+    """
+    return value.strftime(date_format) if value else ''
+
+def history_filter():
+    """
+    Фільтр територій, що мають хоча б одну історію статусів
+    """
+    return {"$or": [{field: {"$exists": True}} for field in HISTORY_FIELDS]}
+
+def history_projection():
+    """
+    Проєкція: назва, категорія та лише експортовані поля періодів
+    """
+    projection = {'name': 1, 'category': 1}
+    projection.update({f"{field}.{period_field}": 1 for field in HISTORY_FIELDS for period_field in EXPORT_PERIOD_FIELDS})
+    return projection
+
+def iter_export_rows(client, collections=None, territory_filter=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Генератор рядків експорту: один рядок на кожен період кожної історії
+    """
+    db = client[DATABASE_NAME]
+    territory_filter = territory_filter or history_filter()
+
+    for collection_name in collections or LEVEL_COLLECTIONS:
+        cursor = db[collection_name].find(territory_filter, history_projection(), batch_size=batch_size)
+
+        for territory in cursor:
+            for history_field in HISTORY_FIELDS:
+                for period in territory.get(history_field) or []:
+                    yield [
+                        territory.get('name', ''),
+                        territory['_id'],
+                        territory.get('category', ''),
+                        collection_name,
+                        period.get('status', ''),
+                        _format_date(period.get('start_date')),
+                        _format_date(period.get('end_date')),
+                        period.get('source_document', ''),
+                        _format_date(period.get('updated_at'), '%d.%m.%Y %H:%M:%S')
+                    ]
+
+def write_csv_rows(rows, output_file, columns=EXPORT_COLUMNS, progress_every=PROGRESS_EVERY):
+    """
+    Запис рядків у CSV по мірі надходження з виведенням прогресу
+    Повертає кількість записаних рядків
+    """
+    started = time.perf_counter()
+    written = 0
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+
+            if progress_every and written % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  ... {written} рядків ({written / elapsed:.0f} рядків/с)")
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else 0
+    print(f"⏱️  {written} рядків за {elapsed:.1f} с ({rate:.0f} рядків/с)")
+    return written
+
+def export_status_csv(client, output_file="enhanced_territory_data.csv", batch_size=EXPORT_BATCH_SIZE,
+                      progress_every=PROGRESS_EVERY):
+    """
+    Потоковий експорт періодів статусів територій у CSV
+    """
+    print(f"\n📤 ЕКСПОРТ ПЕРІОДІВ СТАТУСІВ у {output_file}...")
+
+    written = write_csv_rows(iter_export_rows(client, batch_size=batch_size), output_file,
+                             progress_every=progress_every)
+
+    if written:
+        print(f"✅ Експортовано {written} записів в {output_file}")
+    else:
+        print("❌ Немає даних для експорту")
+
+    return written
+
+def encode_code(code):
+    """
+    Код КАТОТТГ як int64 (None для відсутнього чи нестандартного коду)
+    """
+    match = CODE_PATTERN.fullmatch(code) if code else None
+    return int(match.group(1)) if match else None
+
+def decode_code(value):
+    """
+    Код КАТОТТГ з int64 значення колонкового експорту
+    """
+    return f"UA{value:017d}"
+
+def _parse_iso_date(value):
+    """
+    Дата з рядка РРРР-ММ-ДД (None, якщо не розпізнано)
+    """
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
+
+def iter_territory_records(client, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Генератор записів класифікатора для колонкового експорту
+    """
+    db = client[DATABASE_NAME]
+    projection = {'name': 1, 'category': 1, 'parent_code': 1}
+
+    for collection_name in LEVEL_COLLECTIONS:
+        for territory in db[collection_name].find({}, projection, batch_size=batch_size):
+            yield {
+                'code': encode_code(territory['_id']),
+                'parent_code': encode_code(territory.get('parent_code')),
+                'name': territory.get('name'),
+                'category': territory.get('category'),
+                'level': collection_name
+            }
+
+def iter_period_records(client, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Генератор записів пласкої колекції періодів для колонкового експорту
+    """
+    db = client[DATABASE_NAME]
+    projection = {'_id': 0, **{field: 1 for field, _ in PERIOD_COLUMNS}, 'document_date_iso': 1}
+
+    for period in db[STATUS_PERIODS_COLLECTION].find({}, projection, batch_size=batch_size):
+        yield {
+            'territory_code': encode_code(period.get('territory_code')),
+            'level': period.get('level'),
+            'category': period.get('category'),
+            'history_field': period.get('history_field'),
+            'source': period.get('source'),
+            'inherited_from': encode_code(period.get('inherited_from')),
+            'status': period.get('status'),
+            'start_date': period.get('start_date'),
+            'end_date': period.get('end_date'),
+            'source_document': period.get('source_document'),
+            'document_date': _parse_iso_date(period.get('document_date_iso')),
+            'import_id': period.get('import_id')
+        }
+
+def parquet_schema(columns):
+    """
+    Схема pyarrow для списку колонок
+    """
+    import pyarrow as pa
+
+    types = {
+        'code': pa.int64(),
+        'string': pa.string(),
+        'dictionary': pa.dictionary(pa.int32(), pa.string()),
+        'timestamp': pa.timestamp('s'),
+        'date': pa.date32()
+    }
+    return pa.schema([(name, types[column_type]) for name, column_type in columns])
+
+def write_parquet_records(records, output_file, schema, row_group_size=ROW_GROUP_SIZE, progress_every=PROGRESS_EVERY):
+    """
+    Запис записів у Parquet групами рядків; у пам'яті лише поточна група
+    Повертає кількість записаних рядків
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    started = time.perf_counter()
+    written = 0
+    columns = {name: [] for name in schema.names}
+
+    with pq.ParquetWriter(output_file, schema, compression='zstd') as writer:
+        def flush():
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema), row_group_size=row_group_size)
+            for values in columns.values():
+                values.clear()
+
+        for record in records:
+            for name, values in columns.items():
+                values.append(record[name])
+            written += 1
+
+            if written % row_group_size == 0:
+                flush()
+            if progress_every and written % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  ... {written} рядків ({written / elapsed:.0f} рядків/с)")
+
+        if columns[schema.names[0]] or not written:
+            flush()
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else 0
+    print(f"⏱️  {written} рядків за {elapsed:.1f} с ({rate:.0f} рядків/с)")
+    return written
+
+def export_status_parquet(client, output_dir='.', batch_size=EXPORT_BATCH_SIZE, row_group_size=ROW_GROUP_SIZE):
+    """
+    Колонковий експорт класифікатора та пласкої колекції періодів у Parquet
+    Повертає словник {вид: кількість рядків}
+    """
+    if not has_status_periods(client):
+        print("❌ Колекція status_periods порожня - спочатку виконайте python3 status_periods.py")
+        return {}
+
+    os.makedirs(output_dir, exist_ok=True)
+    sources = {
+        'territories': (iter_territory_records(client, batch_size), parquet_schema(TERRITORY_COLUMNS)),
+        'periods': (iter_period_records(client, batch_size), parquet_schema(PERIOD_COLUMNS))
+    }
+
+    written = {}
+    for kind, (records, schema) in sources.items():
+        output_file = os.path.join(output_dir, PARQUET_FILES[kind])
+        print(f"\n📦 ЕКСПОРТ {kind} у {output_file}...")
+        written[kind] = write_parquet_records(records, output_file, schema, row_group_size)
+        print(f"✅ Експортовано {written[kind]} записів ({os.path.getsize(output_file) / 1024:.0f} КБ)")
+
+    return written
+
+def load_export_state(output_dir=INCREMENTAL_EXPORT_DIR):
+    """
+    Стан інкрементального експорту (None, якщо експорт ще не виконувався)
+    """
+    state_file = os.path.join(output_dir, INCREMENTAL_STATE_FILE)
+    if not os.path.exists(state_file):
+        return None
+
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_export_state(output_dir, state):
+    """
+    Атомарний запис стану: спершу тимчасовий файл, потім заміна
+    """
+    state_file = os.path.join(output_dir, INCREMENTAL_STATE_FILE)
+    with open(state_file + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(state_file + '.tmp', state_file)
+
+def changed_territories_filter(watermark):
+    """
+    Фільтр територій, змінених після позначки часу
+    ($gte: Mongo зберігає час з точністю до мілісекунди, повтор території безпечний)
+    """
+    return {"$or": [{field: {"$gte": watermark}} for field in CHANGE_FIELDS]}
+
+def export_status_incremental(client, output_dir=INCREMENTAL_EXPORT_DIR, full=False, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Експорт періодів територій, змінених після попереднього запуску
+    Перший запуск (або full=True) експортує всі території з історією
+    Файл змін містить усі періоди змінених територій, тож споживач замінює
+    дані кожної території з маніфесту (території без рядків - історію видалено)
+    Повертає маніфест запуску
+    """
+    db = client[DATABASE_NAME]
+    os.makedirs(output_dir, exist_ok=True)
+
+    state = load_export_state(output_dir)
+    previous_watermark = None if full or state is None else datetime.fromisoformat(state['watermark'])
+    sequence = (state['sequence'] + 1) if state else 1
+
+    # Позначка фіксується до читання, щоб зміни під час експорту потрапили в наступний запуск
+    # (Mongo зберігає дати в UTC без часового поясу)
+    watermark = datetime.now(timezone.utc).replace(tzinfo=None)
+    watermark = watermark.replace(microsecond=watermark.microsecond // 1000 * 1000)
+    mode = 'full' if previous_watermark is None else 'delta'
+
+    print(f"\n🔁 ІНКРЕМЕНТАЛЬНИЙ ЕКСПОРТ №{sequence} ({mode})"
+          f"{'' if previous_watermark is None else f' після {previous_watermark.isoformat()}'}...")
+
+    if previous_watermark is None:
+        territory_filter = history_filter()
+    else:
+        territory_filter = changed_territories_filter(previous_watermark)
+        for collection_name in LEVEL_COLLECTIONS:
+            for field in CHANGE_FIELDS:
+                db[collection_name].create_index([(field, pymongo.ASCENDING)])
+
+    territory_codes = sorted(
+        territory['_id']
+        for collection_name in LEVEL_COLLECTIONS
+        for territory in db[collection_name].find(territory_filter, {'_id': 1}, batch_size=batch_size)
+    )
+
+    base_name = f"status_export_{sequence:05d}_{mode}_{watermark.strftime('%Y%m%dT%H%M%S')}"
+    data_file = base_name + '.csv'
+    rows = write_csv_rows(iter_export_rows(client, territory_filter=territory_filter, batch_size=batch_size),
+                          os.path.join(output_dir, data_file))
+
+    manifest = {
+        'sequence': sequence,
+        'mode': mode,
+        'previous_watermark': previous_watermark.isoformat() if previous_watermark else None,
+        'watermark': watermark.isoformat(),
+        'data_version': get_data_version(client),
+        'data_file': data_file,
+        'columns': EXPORT_COLUMNS,
+        'rows': rows,
+        'territory_count': len(territory_codes),
+        'territory_codes': territory_codes,
+        'created_at': datetime.now(timezone.utc).isoformat()
+    }
+    with open(os.path.join(output_dir, base_name + '.manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    _save_export_state(output_dir, {
+        'sequence': sequence,
+        'watermark': manifest['watermark'],
+        'data_version': manifest['data_version'],
+        'last_manifest': base_name + '.manifest.json'
+    })
+
+    print(f"✅ Територій: {len(territory_codes)}, записів: {rows} → {os.path.join(output_dir, data_file)}")
+    return manifest
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Потоковий експорт періодів статусів територій")
+    arg_parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                            help="csv - періоди історій; parquet - класифікатор і пласка колекція періодів")
+    arg_parser.add_argument('-o', '--output', default=None,
+                            help="Файл CSV (enhanced_territory_data.csv) або каталог Parquet (поточний)")
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help="Лише зміни після попереднього запуску (каталог -o, за замовчуванням exports)")
+    arg_parser.add_argument('--full', action='store_true',
+                            help="Для --incremental: повний експорт з новою позначкою часу")
+    arg_parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE,
+                            help=f"Розмір пакета курсора ({EXPORT_BATCH_SIZE})")
+    args = arg_parser.parse_args()
+
+    print("📤 ЕКСПОРТ СТАТУСІВ ТЕРИТОРІЙ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        if args.incremental:
+            export_status_incremental(client, args.output or INCREMENTAL_EXPORT_DIR, full=args.full,
+                                      batch_size=args.batch_size)
+        elif args.format == 'parquet':
+            export_status_parquet(client, args.output or '.', batch_size=args.batch_size)
+        else:
+            export_status_csv(client, args.output or 'enhanced_territory_data.csv', batch_size=args.batch_size)
+    except ImportError as e:
+        print(f"❌ Для експорту у Parquet потрібен pyarrow: {e}")
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
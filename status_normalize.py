@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Нормалізація історій статусів
+Перекриті, суміжні та повторні періоди одного статусу в межах історії території
+зливаються в один період; джерела злитих періодів зберігаються в полі merged_from
+Суміжними вважаються періоди з проміжком до ADJACENCY_GAP, тож після злиття статус
+діє і в днях такого проміжку; поза ними відповіді на запит "статус на дату" не змінюються
+"""
+
+import argparse
+from pymongo import UpdateOne
+from datetime import datetime, timedelta, timezone
+
+from status_periods import connect_to_mongodb, rebuild_status_periods, DATABASE_NAME
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS, BULK_BATCH_SIZE, propagate_status_to_descendants
+from status_current import recompute_current_status
+
+# Періоди вважаються суміжними, якщо наступний починається не пізніше ніж
+# через день після кінця попереднього (дати в Переліку - з точністю до дня)
+ADJACENCY_GAP = timedelta(days=1)
+
+# Поля джерела, що зберігаються для кожного злитого періоду
+PROVENANCE_FIELDS = ['source_document', 'document_date', 'document_date_iso', 'import_id', 'table_source',
+                     'start_date', 'end_date']
+
+def _provenance(period):
+    """
+    Записи про джерела періоду (для вже злитого періоду - його merged_from)
+    """
+    if period.get('merged_from'):
+        return list(period['merged_from'])
+    return [{field: period.get(field) for field in PROVENANCE_FIELDS if field in period}]
+
+def coalesce_periods(periods):
+    """
+    Злиття перекритих і суміжних періодів одного статусу
+    Періоди без дати початку не зливаються (лише точні повтори відкидаються)
+    Злитий період стоїть на місці першого зі своїх періодів, тож без злиттів
+    історія повертається незмінною
+    """
+    by_status = {}
+    undated = []
+
+    for position, period in enumerate(periods):
+        if period.get('start_date') is None:
+            if all(period != kept for _, kept in undated):
+                undated.append((position, period))
+        else:
+            by_status.setdefault(period.get('status'), []).append((position, period))
+
+    result = list(undated)
+    for status_periods in by_status.values():
+        ordered = sorted(status_periods, key=lambda item: (item[1]['start_date'], item[0]))
+
+        merged = None
+        for position, period in ordered:
+            if merged is not None and (merged[1].get('end_date') is None or
+                                       period['start_date'] <= merged[1]['end_date'] + ADJACENCY_GAP):
+                # Продовжуємо поточний період; відкритий кінець поглинає будь-який інший
+                merged_end = merged[1].get('end_date')
+                if merged_end is not None and (period.get('end_date') is None or period['end_date'] > merged_end):
+                    merged[1]['end_date'] = period.get('end_date')
+                merged[2].extend(_provenance(period))
+                merged[0] = min(merged[0], position)
+                continue
+
+            if merged is not None:
+                result.append((merged[0], _finish_merge(merged[1], merged[2])))
+            merged = [position, dict(period), _provenance(period)]
+
+        if merged is not None:
+            result.append((merged[0], _finish_merge(merged[1], merged[2])))
+
+    return [period for _, period in sorted(result, key=lambda item: item[0])]
+
+def _finish_merge(merged, sources):
+    """
+    Запис джерел злитого періоду; одиночний період лишається без змін
+    """
+    # Повтори того самого джерела (той самий імпорт і ті самі дати) - одне джерело
+    unique_sources = []
+    for source in sources:
+        if source not in unique_sources:
+            unique_sources.append(source)
+
+    if len(unique_sources) > 1:
+        merged['merged_from'] = unique_sources
+    else:
+        merged.pop('merged_from', None)
+    return merged
+
+def normalize_status_histories(client, dry_run=False):
+    """
+    Нормалізація історій усіх територій масовими оновленнями по колекціях
+    Повертає статистику та множину кодів змінених територій
+    """
+    db = client[DATABASE_NAME]
+    normalized_at = datetime.now(timezone.utc)
+
+    stats = {'territories': 0, 'changed': 0, 'periods_before': 0, 'periods_after': 0}
+    changed_codes = set()
+
+    print(f"\n🧽 НОРМАЛІЗАЦІЯ ІСТОРІЙ СТАТУСІВ{' (пробний запуск)' if dry_run else ''}...")
+
+    for collection_name in LEVEL_COLLECTIONS:
+        collection = db[collection_name]
+        operations = []
+        collection_changed = 0
+
+        history_filter = {"$or": [{field: {"$exists": True}} for field in HISTORY_FIELDS]}
+        projection = {field: 1 for field in HISTORY_FIELDS}
+
+        for territory_doc in collection.find(history_filter, projection):
+            stats['territories'] += 1
+            update = {}
+
+            for history_field in HISTORY_FIELDS:
+                periods = territory_doc.get(history_field)
+                if not periods:
+                    continue
+
+                normalized = coalesce_periods(periods)
+                stats['periods_before'] += len(periods)
+                stats['periods_after'] += len(normalized)
+
+                if normalized != periods:
+                    update[history_field] = normalized
+
+            if not update:
+                continue
+
+            collection_changed += 1
+            changed_codes.add(territory_doc['_id'])
+            update['last_normalized_at'] = normalized_at
+            operations.append(UpdateOne({'_id': territory_doc['_id']}, {'$set': update}))
+
+            if len(operations) >= BULK_BATCH_SIZE:
+                if not dry_run:
+                    collection.bulk_write(operations, ordered=False)
+                operations = []
+
+        if operations and not dry_run:
+            collection.bulk_write(operations, ordered=False)
+
+        stats['changed'] += collection_changed
+        print(f"  {collection_name}: змінено {collection_changed}")
+
+    print(f"✅ Територій з історією: {stats['territories']}, змінено: {stats['changed']}")
+    print(f"📉 Періодів: {stats['periods_before']} → {stats['periods_after']}")
+
+    return stats, changed_codes
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Злиття перекритих і суміжних періодів статусів")
+    arg_parser.add_argument('--dry-run', action='store_true', help="Лише підрахунок, без запису змін")
+    args = arg_parser.parse_args()
+
+    print("🧽 НОРМАЛІЗАЦІЯ ПЕРІОДІВ СТАТУСІВ")
+    print("=" * 60)
+
+    client = connect_to_mongodb()
+
+    try:
+        stats, changed_codes = normalize_status_histories(client, dry_run=args.dry_run)
+
+        if changed_codes and not args.dry_run:
+            # Похідні дані: успадковані періоди, пласка колекція та поточний статус
+            _, propagated_codes = propagate_status_to_descendants(client)
+            rebuild_status_periods(client)
+            recompute_current_status(client, changed_codes | propagated_codes)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
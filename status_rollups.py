@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Зведення покриття статусами по областях і районах
+Агрегація по колекції status_periods записується ($merge) у колекцію status_rollups:
+один документ на (дата, версія даних, одиниця), тож дашборд читає готовий документ
+"""
+
+import pymongo
+from datetime import datetime, timezone
+import sys
+
+from status_periods import (
+    connect_to_mongodb, get_data_version, DATABASE_NAME, STATUS_PERIODS_COLLECTION
+)
+
+STATUS_ROLLUPS_COLLECTION = 'status_rollups'
+
+# Рівні зведення; код КАТОТТГ містить код області (UA + 2 цифри)
+# та району (ще 2 цифри) у префіксі
+SCOPE_TOTAL = 'total'
+SCOPE_OBLAST = 'oblast'
+SCOPE_RAION = 'raion'
+
+TOTAL_UNIT_CODE = 'UA'
+OBLAST_PREFIX_LENGTH = 4
+RAION_PREFIX_LENGTH = 6
+
+def rollup_id(rollup_date, version, unit_code):
+    """
+    Ключ документа зведення
+    """
+    return f"{rollup_date.strftime('%Y-%m-%d')}:{version}:{unit_code}"
+
+def _prefix_lookup(collection_name, prefix_length, alias):
+    """
+    $lookup одиниці (області/району) за префіксом коду
+    """
+    return {
+        "$lookup": {
+            "from": collection_name,
+            "let": {"prefix": {"$substrCP": ["$_id.unit", 0, prefix_length]}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": [{"$substrCP": ["$_id", 0, prefix_length]}, "$$prefix"]}}},
+                {"$project": {"name": 1}}
+            ],
+            "as": alias
+        }
+    }
+
+def rollup_pipeline(rollup_date, version):
+    """
+    Pipeline зведення на дату: територія рахується в кожному статусі один раз
+    (власні та успадковані періоди), після чого підсумовується для країни,
+    області та району
+    """
+    date_key = rollup_date.strftime('%Y-%m-%d')
+
+    return [
+        {
+            "$match": {
+                "$and": [
+                    {"$or": [{"start_date": None}, {"start_date": {"$lte": rollup_date}}]},
+                    {"$or": [{"end_date": None}, {"end_date": {"$gte": rollup_date}}]}
+                ]
+            }
+        },
+        {
+            "$group": {
+                "_id": {"code": "$territory_code", "status": "$status"},
+                "level": {"$first": "$level"}
+            }
+        },
+        {
+            "$project": {
+                "status": "$_id.status",
+                "level": 1,
+                "units": {"$concatArrays": [
+                    [
+                        {"scope": SCOPE_TOTAL, "unit": TOTAL_UNIT_CODE},
+                        {"scope": SCOPE_OBLAST, "unit": {"$substrCP": ["$_id.code", 0, OBLAST_PREFIX_LENGTH]}}
+                    ],
+                    {"$cond": [
+                        {"$eq": ["$level", "level1_regions"]},
+                        [],
+                        [{"scope": SCOPE_RAION, "unit": {"$substrCP": ["$_id.code", 0, RAION_PREFIX_LENGTH]}}]
+                    ]}
+                ]}
+            }
+        },
+        {"$unwind": "$units"},
+        {
+            "$group": {
+                "_id": {"scope": "$units.scope", "unit": "$units.unit", "status": "$status", "level": "$level"},
+                "territories": {"$sum": 1}
+            }
+        },
+        {
+            "$group": {
+                "_id": {"scope": "$_id.scope", "unit": "$_id.unit", "status": "$_id.status"},
+                "levels": {"$push": {"k": "$_id.level", "v": "$territories"}},
+                "territories": {"$sum": "$territories"}
+            }
+        },
+        {
+            "$group": {
+                "_id": {"scope": "$_id.scope", "unit": "$_id.unit"},
+                "statuses": {"$push": {
+                    "status": "$_id.status",
+                    "territories": "$territories",
+                    "levels": {"$arrayToObject": "$levels"}
+                }}
+            }
+        },
+        _prefix_lookup('level1_regions', OBLAST_PREFIX_LENGTH, 'oblast'),
+        _prefix_lookup('level2_raions', RAION_PREFIX_LENGTH, 'raion'),
+        {
+            "$project": {
+                "_id": {"$concat": [date_key, ":", str(version), ":", "$_id.unit"]},
+                "date": {"$literal": rollup_date},
+                "version": {"$literal": version},
+                "scope": "$_id.scope",
+                "unit_code": "$_id.unit",
+                "oblast_code": {"$first": "$oblast._id"},
+                "oblast_name": {"$first": "$oblast.name"},
+                "raion_code": {"$cond": [
+                    {"$eq": ["$_id.scope", SCOPE_RAION]}, {"$first": "$raion._id"}, None
+                ]},
+                "raion_name": {"$cond": [
+                    {"$eq": ["$_id.scope", SCOPE_RAION]}, {"$first": "$raion.name"}, None
+                ]},
+                "statuses": 1,
+                "built_at": {"$literal": datetime.now(timezone.utc)}
+            }
+        },
+        {
+            "$merge": {
+                "into": STATUS_ROLLUPS_COLLECTION,
+                "on": "_id",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }
+        }
+    ]
+
+def build_status_rollups(client, rollup_date=None):
+    """
+    Побудова зведень на дату (за замовчуванням - сьогодні) для поточної версії даних
+    """
+    db = client[DATABASE_NAME]
+    rollup_date = rollup_date or datetime.now()
+    rollup_date = datetime(rollup_date.year, rollup_date.month, rollup_date.day)
+    version = get_data_version(client)
+
+    print(f"\n🧾 ПОБУДОВА ЗВЕДЕНЬ СТАТУСІВ на {rollup_date.strftime('%d.%m.%Y')} (версія даних {version})...")
+
+    db[STATUS_PERIODS_COLLECTION].aggregate(rollup_pipeline(rollup_date, version))
+
+    rollups = db[STATUS_ROLLUPS_COLLECTION]
+    rollups.create_index([('date', pymongo.ASCENDING), ('version', pymongo.ASCENDING), ('scope', pymongo.ASCENDING)])
+
+    built = rollups.count_documents({'date': rollup_date, 'version': version})
+    print(f"✅ Документів зведення: {built}")
+    return built
+
+def get_status_rollup(client, unit_code=TOTAL_UNIT_CODE, rollup_date=None):
+    """
+    Зведення для одиниці (країна 'UA', префікс області 'UA05' чи району 'UA0502')
+    на дату для поточної версії даних; будується за потреби
+    """
+    db = client[DATABASE_NAME]
+    rollup_date = rollup_date or datetime.now()
+    rollup_date = datetime(rollup_date.year, rollup_date.month, rollup_date.day)
+    version = get_data_version(client)
+
+    document_id = rollup_id(rollup_date, version, unit_code)
+    rollup = db[STATUS_ROLLUPS_COLLECTION].find_one({'_id': document_id})
+
+    if rollup is None and not db[STATUS_ROLLUPS_COLLECTION].find_one({'date': rollup_date, 'version': version}, {'_id': 1}):
+        build_status_rollups(client, rollup_date)
+        rollup = db[STATUS_ROLLUPS_COLLECTION].find_one({'_id': document_id})
+
+    return rollup
+
+def get_oblast_rollups(client, rollup_date=None):
+    """
+    Зведення всіх областей на дату для поточної версії даних
+    """
+    db = client[DATABASE_NAME]
+    rollup_date = rollup_date or datetime.now()
+    rollup_date = datetime(rollup_date.year, rollup_date.month, rollup_date.day)
+
+    # Гарантуємо, що зведення на дату побудовані
+    get_status_rollup(client, TOTAL_UNIT_CODE, rollup_date)
+
+    return list(db[STATUS_ROLLUPS_COLLECTION].find(
+        {'date': rollup_date, 'version': get_data_version(client), 'scope': SCOPE_OBLAST}
+    ).sort('unit_code', pymongo.ASCENDING))
+
+def print_rollups(rollups):
+    """
+    Виведення зведень у консоль
+    """
+    for rollup in rollups:
+        title = rollup.get('raion_name') or rollup.get('oblast_name') or rollup['unit_code']
+        print(f"\n  📍 {title} ({rollup['unit_code']})")
+        for status in sorted(rollup['statuses'], key=lambda item: item['status'] or ''):
+            levels = ', '.join(f"{level}: {count}" for level, count in sorted(status['levels'].items()))
+            print(f"    {status['status']}: {status['territories']} ({levels})")
+
+def main():
+    """Головна функція"""
+    print("🧾 ЗВЕДЕННЯ СТАТУСІВ ПО ОБЛАСТЯХ І РАЙОНАХ")
+    print("=" * 60)
+
+    rollup_date = datetime.now()
+    if len(sys.argv) > 1:
+        try:
+            rollup_date = datetime.strptime(sys.argv[1], '%d.%m.%Y')
+        except ValueError:
+            print(f"❌ Невірний формат дати: {sys.argv[1]}")
+            sys.exit(1)
+
+    client = connect_to_mongodb()
+
+    try:
+        build_status_rollups(client, rollup_date)
+        print_rollups(get_oblast_rollups(client, rollup_date))
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
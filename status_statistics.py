@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Статистика статусів територій однією агрегацією на сервері
+Колекції рівнів об'єднуються через $unionWith, а $facet рахує в одному проході
+кількості територій по колекціях, розподіл періодів по статусах і дати документів;
+клієнт отримує лише підсумкові числа
+"""
+
+from status_periods import DATABASE_NAME
+from status_propagation import LEVEL_COLLECTIONS, HISTORY_FIELDS
+
+UNKNOWN_STATUS = 'Невідомий'
+
+# Лічильники для кожної колекції
+COLLECTION_COUNTERS = [
+    'territories',
+    'with_history',
+    'with_document_dates',
+    'without_document_dates',
+    'records_with_dates',
+    'records_without_dates'
+]
+
+def _territory_projection(collection_name):
+    """
+    Проєкція території: колекція, ознака історії та всі періоди трьох історій
+    """
+    return {
+        "$project": {
+            "_id": 0,
+            "collection": {"$literal": collection_name},
+            "has_history": {"$or": [{"$gt": [f"${field}", None]} for field in HISTORY_FIELDS]},
+            "periods": {"$concatArrays": [{"$ifNull": [f"${field}", []]} for field in HISTORY_FIELDS]}
+        }
+    }
+
+def statistics_pipeline():
+    """
+    Pipeline статистики (запускається на першій колекції рівнів)
+    """
+    pipeline = [_territory_projection(LEVEL_COLLECTIONS[0])]
+    pipeline += [
+        {"$unionWith": {"coll": collection_name, "pipeline": [_territory_projection(collection_name)]}}
+        for collection_name in LEVEL_COLLECTIONS[1:]
+    ]
+
+    pipeline += [
+        {
+            "$addFields": {
+                "period_count": {"$size": "$periods"},
+                "dated_count": {"$size": {"$filter": {
+                    "input": "$periods",
+                    "as": "period",
+                    "cond": {"$gt": [{"$ifNull": ["$$period.document_date", None]}, None]}
+                }}}
+            }
+        },
+        {
+            "$facet": {
+                "collections": [
+                    {
+                        "$group": {
+                            "_id": "$collection",
+                            "territories": {"$sum": 1},
+                            "with_history": {"$sum": {"$cond": ["$has_history", 1, 0]}},
+                            "with_document_dates": {"$sum": {"$cond": [{"$gt": ["$dated_count", 0]}, 1, 0]}},
+                            "without_document_dates": {"$sum": {"$cond": [
+                                {"$and": ["$has_history", {"$eq": ["$dated_count", 0]}]}, 1, 0
+                            ]}},
+                            "records_with_dates": {"$sum": "$dated_count"},
+                            "records_without_dates": {"$sum": {"$subtract": ["$period_count", "$dated_count"]}}
+                        }
+                    }
+                ],
+                "statuses": [
+                    {"$unwind": "$periods"},
+                    {"$group": {"_id": {"$ifNull": ["$periods.status", UNKNOWN_STATUS]}, "count": {"$sum": 1}}}
+                ],
+                "document_dates": [
+                    {"$unwind": "$periods"},
+                    {"$match": {"periods.document_date": {"$ne": None}}},
+                    {"$group": {"_id": "$periods.document_date"}}
+                ]
+            }
+        }
+    ]
+
+    return pipeline
+
+def get_status_statistics(client):
+    """
+    Статистика статусів за один запит до сервера
+    Повертає словник: collections ({колекція: лічильники}), totals (сума лічильників),
+    status_counts ({статус: кількість періодів}), document_dates (відсортований список)
+    """
+    db = client[DATABASE_NAME]
+    result = next(db[LEVEL_COLLECTIONS[0]].aggregate(statistics_pipeline()), None) or {}
+
+    collections = {
+        collection_name: {counter: 0 for counter in COLLECTION_COUNTERS}
+        for collection_name in LEVEL_COLLECTIONS
+    }
+    for group in result.get('collections', []):
+        collections[group['_id']].update({counter: group[counter] for counter in COLLECTION_COUNTERS})
+
+    return {
+        'collections': collections,
+        'totals': {
+            counter: sum(counts[counter] for counts in collections.values())
+            for counter in COLLECTION_COUNTERS
+        },
+        'status_counts': {group['_id']: group['count'] for group in result.get('statuses', [])},
+        'document_dates': sorted(group['_id'] for group in result.get('document_dates', []))
+    }
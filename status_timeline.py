@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Матеріалізована шкала змін статусів
+Статуси змінюються лише в кілька сотень дат, тому для кожного інтервалу між
+датами змін зберігається знімок належності територій до кожного статусу у
+вигляді бітсету над індексами територій рушія статусів
+Запит на дату - бінарний пошук інтервалу та читання бітсету; порівняння дат -
+побітові операції
+"""
+
+import numpy as np
+from datetime import datetime
+import sys
+import time
+
+from status_engine import get_status_engine, to_timestamp, OPEN_END
+from status_periods import connect_to_mongodb
+
+class StatusTimeline:
+    """
+    Шкала змін статусів над індексами територій рушія
+
+    change_points - відсортовані моменти змін (секунди епохи);
+    snapshots[k, s] - упакований бітсет територій зі статусом s
+    на інтервалі [change_points[k], change_points[k + 1])
+    """
+
+    def __init__(self, engine, include_inherited=False):
+        self.engine = engine
+        self.version = engine.version
+        self.include_inherited = include_inherited
+        self.territory_count = len(engine.codes)
+        self.statuses = list(engine.statuses)
+        self._build()
+
+    def _build(self):
+        """
+        Один прохід по подіях початку та кінця періодів з лічильниками
+        активних періодів для кожної пари (статус, територія)
+        """
+        engine = self.engine
+
+        # Періоди з датою кінця раніше початку не активні на жодну дату
+        selected = engine.ends >= engine.starts
+        if not self.include_inherited:
+            selected &= engine.own
+        territory_idx = engine.territory_idx[selected]
+        status_idx = engine.status_idx[selected]
+        starts = engine.starts[selected]
+        ends = engine.ends[selected]
+
+        # Період активний до дати кінця включно, тож зникає в наступну секунду
+        closed = ends != OPEN_END
+        stops = ends[closed] + 1
+
+        self.change_points = np.unique(np.concatenate([starts, stops]))
+
+        start_slot = np.searchsorted(self.change_points, starts)
+        stop_slot = np.full(len(ends), len(self.change_points), dtype=np.int64)
+        stop_slot[closed] = np.searchsorted(self.change_points, stops)
+
+        # Періоди, що починаються/закінчуються в кожній точці зміни
+        start_order = np.argsort(start_slot, kind='stable')
+        start_bounds = np.searchsorted(start_slot[start_order], np.arange(len(self.change_points) + 1))
+        stop_order = np.argsort(stop_slot, kind='stable')
+        stop_bounds = np.searchsorted(stop_slot[stop_order], np.arange(len(self.change_points) + 1))
+
+        counts = np.zeros((len(self.statuses), self.territory_count), dtype=np.int32)
+        byte_count = (self.territory_count + 7) // 8
+        self.snapshots = np.zeros((len(self.change_points), len(self.statuses), byte_count), dtype=np.uint8)
+
+        for slot in range(len(self.change_points)):
+            starting = start_order[start_bounds[slot]:start_bounds[slot + 1]]
+            np.add.at(counts, (status_idx[starting], territory_idx[starting]), 1)
+
+            stopping = stop_order[stop_bounds[slot]:stop_bounds[slot + 1]]
+            np.subtract.at(counts, (status_idx[stopping], territory_idx[stopping]), 1)
+
+            self.snapshots[slot] = np.packbits(counts > 0, axis=1)
+
+    def _empty(self):
+        """
+        Порожній бітсет
+        """
+        return np.zeros((self.territory_count + 7) // 8, dtype=np.uint8)
+
+    def members(self, query_date, status_value=None):
+        """
+        Бітсет територій зі статусом (або з будь-яким статусом) на дату
+        """
+        slot = np.searchsorted(self.change_points, to_timestamp(query_date), side='right') - 1
+        if slot < 0:
+            return self._empty()
+
+        if status_value is None:
+            return np.bitwise_or.reduce(self.snapshots[slot], axis=0) if self.statuses else self._empty()
+
+        if status_value not in self.statuses:
+            return self._empty()
+        return self.snapshots[slot, self.statuses.index(status_value)]
+
+    def difference(self, first_date, second_date, status_value=None):
+        """
+        Території зі статусом на першу дату, але без нього на другу
+        """
+        return self.members(first_date, status_value) & ~self.members(second_date, status_value)
+
+    def indices(self, bitset):
+        """
+        Індекси територій, встановлені в бітсеті
+        """
+        return np.flatnonzero(np.unpackbits(bitset, count=self.territory_count))
+
+    def codes(self, bitset):
+        """
+        Коди територій, встановлені в бітсеті
+        """
+        return [self.engine.codes[index] for index in self.indices(bitset)]
+
+    def count(self, bitset):
+        """
+        Кількість територій у бітсеті
+        """
+        return int(np.unpackbits(bitset, count=self.territory_count).sum())
+
+    def change_dates(self):
+        """
+        Дати змін статусів
+        """
+        return self.change_points.astype('datetime64[s]').astype(datetime).tolist()
+
+# Шкали, спільні для всіх запитів, окремо для власних і успадкованих статусів
+_timelines = {}
+
+def get_status_timeline(client, include_inherited=False):
+    """
+    Шкала змін для клієнта, перебудована при зміні версії даних
+    """
+    engine = get_status_engine(client)
+    key = (id(client), include_inherited)
+    timeline = _timelines.get(key)
+
+    if timeline is None or timeline.engine is not engine or timeline.version != engine.version:
+        started = time.perf_counter()
+        timeline = _timelines[key] = StatusTimeline(engine, include_inherited)
+        elapsed = time.perf_counter() - started
+        print(f"📆 Шкала змін: {len(timeline.change_points)} дат змін, "
+              f"{timeline.territory_count} територій ({elapsed:.2f} с)")
+
+    return timeline
+
+def main():
+    """Головна функція"""
+    print("📆 ШКАЛА ЗМІН СТАТУСІВ")
+    print("=" * 60)
+
+    if len(sys.argv) < 2:
+        print("Використання: python3 status_timeline.py ДД.ММ.РРРР [ДД.ММ.РРРР]")
+        sys.exit(1)
+
+    try:
+        dates = [datetime.strptime(value, '%d.%m.%Y') for value in sys.argv[1:3]]
+    except ValueError as e:
+        print(f"❌ Невірний формат дати: {e}")
+        sys.exit(1)
+
+    client = connect_to_mongodb()
+
+    try:
+        timeline = get_status_timeline(client)
+
+        for status_value in timeline.statuses:
+            counts = [timeline.count(timeline.members(query_date, status_value)) for query_date in dates]
+            line = f"  {status_value}: " + " → ".join(str(count) for count in counts)
+
+            if len(dates) == 2:
+                exited = timeline.count(timeline.difference(dates[0], dates[1], status_value))
+                entered = timeline.count(timeline.difference(dates[1], dates[0], status_value))
+                line += f" (+{entered} / -{exited})"
+
+            print(line)
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Щоденний часовий ряд кількості територій у кожному статусі
+Рахується векторно: періоди переводяться в дні, об'єднуються в межах
+території та статусу, після чого події початку/кінця підсумовуються
+кумулятивною сумою по днях
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+import sys
+import time
+
+from status_engine import get_status_engine, OPEN_END
+from status_periods import connect_to_mongodb, DATABASE_NAME
+from status_propagation import LEVEL_COLLECTIONS
+
+# Початок повномасштабного вторгнення - типовий початок ряду
+SERIES_START_DATE = datetime(2022, 2, 24)
+
+SECONDS_PER_DAY = 86400
+
+def load_oblast_index(client):
+    """
+    Код території -> (код області, назва області) за ланцюжком parent_code
+    """
+    db = client[DATABASE_NAME]
+
+    parents = {}
+    names = {}
+    for collection_name in LEVEL_COLLECTIONS:
+        for doc in db[collection_name].find({}, {'name': 1, 'parent_code': 1}):
+            parents[doc['_id']] = doc.get('parent_code')
+            names[doc['_id']] = doc.get('name')
+
+    oblasts = {}
+
+    def resolve(code):
+        chain = []
+        while code not in oblasts:
+            parent_code = parents.get(code)
+            chain.append(code)
+            if not parent_code or parent_code == code or parent_code not in parents:
+                oblasts[code] = (code, names.get(code))
+                break
+            code = parent_code
+        for visited in chain:
+            oblasts[visited] = oblasts[code]
+        return oblasts[code]
+
+    for code in parents:
+        resolve(code)
+
+    return oblasts
+
+def _merge_intervals(keys, starts, stops):
+    """
+    Об'єднання інтервалів [start, stop), що перетинаються, в межах кожного ключа
+    Повертає (ключі, початки, кінці) об'єднаних інтервалів
+    """
+    if len(keys) == 0:
+        return keys, starts, stops
+
+    order = np.lexsort((starts, keys))
+    keys, starts, stops = keys[order], starts[order], stops[order]
+
+    # Ключі відсортовані, тож зсув ключем робить накопичувальний максимум
+    # кінця незалежним для кожного ключа
+    offset = int(stops.max()) + 1
+    running_stop = np.maximum.accumulate(keys * offset + stops) - keys * offset
+
+    new_interval = np.ones(len(keys), dtype=bool)
+    new_interval[1:] = (keys[1:] != keys[:-1]) | (starts[1:] > running_stop[:-1])
+
+    group = np.cumsum(new_interval) - 1
+    merged_stops = np.zeros(group[-1] + 1, dtype=stops.dtype)
+    np.maximum.at(merged_stops, group, running_stop)
+
+    return keys[new_interval], starts[new_interval], merged_stops
+
+def build_status_timeseries(engine, start_date=SERIES_START_DATE, end_date=None,
+                            include_inherited=True, oblast_index=None):
+    """
+    Кількість територій у кожному статусі на кожен день діапазону
+    по рівнях (і, якщо передано oblast_index, по областях)
+    Повертає DataFrame: date, status, level, [oblast_code, oblast_name], territories
+    """
+    end_date = end_date or datetime.now()
+    first_day = int(np.datetime64(start_date, 'D').astype(np.int64))
+    last_day = int(np.datetime64(end_date, 'D').astype(np.int64))
+    day_count = last_day - first_day + 1
+
+    selected = np.ones(len(engine.starts), dtype=bool) if include_inherited else engine.own.copy()
+    territory_idx = engine.territory_idx[selected].astype(np.int64)
+    status_idx = engine.status_idx[selected].astype(np.int64)
+
+    # Періоди в днях ряду: [початок, кінець + 1 день)
+    starts = engine.starts[selected] // SECONDS_PER_DAY - first_day
+    ends = engine.ends[selected]
+    stops = np.where(ends == OPEN_END, day_count, ends // SECONDS_PER_DAY + 1 - first_day)
+    starts = np.clip(starts, 0, day_count)
+    stops = np.clip(stops, 0, day_count)
+
+    visible = stops > starts
+    territory_idx, status_idx, starts, stops = territory_idx[visible], status_idx[visible], starts[visible], stops[visible]
+
+    # Група ряду: статус x рівень x (область)
+    level_names = sorted(set(engine.levels), key=LEVEL_COLLECTIONS.index)
+    territory_level = np.array([level_names.index(level) for level in engine.levels], dtype=np.int64)
+
+    if oblast_index is not None:
+        oblasts = sorted({oblast_index.get(code, (code, None)) for code in engine.codes}, key=lambda oblast: oblast[0])
+        oblast_position = {oblast: position for position, oblast in enumerate(oblasts)}
+        territory_oblast = np.array(
+            [oblast_position[oblast_index.get(code, (code, None))] for code in engine.codes], dtype=np.int64
+        )
+    else:
+        oblasts = [None]
+        territory_oblast = np.zeros(len(engine.codes), dtype=np.int64)
+
+    level_count, oblast_count = len(level_names), len(oblasts)
+    group = (status_idx * level_count + territory_level[territory_idx]) * oblast_count + territory_oblast[territory_idx]
+
+    # Територія рахується один раз, навіть якщо має кілька періодів одного статусу
+    keys, starts, stops = _merge_intervals(group * len(engine.codes) + territory_idx, starts, stops)
+    group = keys // len(engine.codes) if len(engine.codes) else keys
+
+    group_count = len(engine.statuses) * level_count * oblast_count
+    events = np.zeros((group_count, day_count + 1), dtype=np.int32)
+    np.add.at(events, (group, starts), 1)
+    np.add.at(events, (group, stops), -1)
+    counts = np.cumsum(events[:, :day_count], axis=1)
+
+    # Лише групи, що мали хоча б одну територію
+    present = np.flatnonzero(counts.any(axis=1))
+    dates = pd.date_range(start=pd.Timestamp(first_day, unit='D'), periods=day_count, freq='D')
+
+    status_of_group = present // (level_count * oblast_count)
+    level_of_group = (present // oblast_count) % level_count
+    oblast_of_group = present % oblast_count
+
+    frame = pd.DataFrame({
+        'date': np.tile(dates.values, len(present)),
+        'status': np.repeat(np.array(engine.statuses, dtype=object)[status_of_group], day_count),
+        'level': np.repeat(np.array(level_names, dtype=object)[level_of_group], day_count),
+        'territories': counts[present].ravel()
+    })
+
+    if oblast_index is not None:
+        frame.insert(3, 'oblast_code', np.repeat(np.array([oblast[0] for oblast in oblasts], dtype=object)[oblast_of_group], day_count))
+        frame.insert(4, 'oblast_name', np.repeat(np.array([oblast[1] for oblast in oblasts], dtype=object)[oblast_of_group], day_count))
+
+    return frame
+
+def write_timeseries(frame, output_file):
+    """
+    Збереження ряду у CSV або Parquet (за розширенням файлу)
+    """
+    if output_file.lower().endswith('.parquet'):
+        frame.to_parquet(output_file, index=False)
+    else:
+        frame.to_csv(output_file, index=False, encoding='utf-8', date_format='%Y-%m-%d')
+
+def main():
+    """Головна функція"""
+    arg_parser = argparse.ArgumentParser(description="Щоденний часовий ряд статусів територій")
+    arg_parser.add_argument('--start', default=SERIES_START_DATE.strftime('%d.%m.%Y'),
+                            help="Перша дата ряду ДД.ММ.РРРР (за замовчуванням 24.02.2022)")
+    arg_parser.add_argument('--end', help="Остання дата ряду ДД.ММ.РРРР (за замовчуванням сьогодні)")
+    arg_parser.add_argument('--by-oblast', action='store_true', help="Групувати також за областями")
+    arg_parser.add_argument('--own-only', action='store_true', help="Лише власні статуси, без успадкованих")
+    arg_parser.add_argument('-o', '--output', default='status_timeseries.csv',
+                            help="Файл результату (.csv або .parquet), за замовчуванням status_timeseries.csv")
+    args = arg_parser.parse_args()
+
+    print("📈 ЩОДЕННИЙ ЧАСОВИЙ РЯД СТАТУСІВ")
+    print("=" * 60)
+
+    try:
+        start_date = datetime.strptime(args.start, '%d.%m.%Y')
+        end_date = datetime.strptime(args.end, '%d.%m.%Y') if args.end else datetime.now()
+    except ValueError as e:
+        print(f"❌ Невірний формат дати: {e}")
+        sys.exit(1)
+
+    client = connect_to_mongodb()
+
+    try:
+        engine = get_status_engine(client)
+        oblast_index = load_oblast_index(client) if args.by_oblast else None
+
+        started = time.perf_counter()
+        frame = build_status_timeseries(engine, start_date, end_date, not args.own_only, oblast_index)
+        elapsed = time.perf_counter() - started
+
+        write_timeseries(frame, args.output)
+
+        print(f"✅ Рядків: {len(frame)}, днів: {(end_date - start_date).days + 1}, час обчислення: {elapsed:.3f} с")
+        print(f"📄 Результат збережено в {args.output}")
+    except ImportError as e:
+        print(f"❌ Для збереження у Parquet потрібен pyarrow: {e}")
+    except Exception as e:
+        print(f"\n❌ Помилка виконання: {e}")
+    finally:
+        client.close()
+        print("\n🔌 З'єднання з MongoDB закрито")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Скрипти лежать у корені репозиторію - додаємо його до шляху імпорту
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
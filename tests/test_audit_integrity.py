@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Тести перевірки цілісності ієрархії
+"""
+
+import pandas as pd
+
+from audit_integrity import audit_hierarchy
+
+def _territories(rows):
+    return pd.DataFrame(rows, columns=['code', 'collection', 'category', 'parent_code'])
+
+def test_city_directly_under_oblast_is_valid():
+    # Прип'ять і Чорнобиль у класифікаторі підпорядковані безпосередньо Київській області
+    issues = audit_hierarchy(_territories([
+        ('UA32000000000030281', 'level1_regions', 'O', None),
+        ('UA32000000010085013', 'level4_settlements', 'M', 'UA32000000000030281'),
+        ('UA32000000020050699', 'level4_settlements', 'M', 'UA32000000000030281')
+    ]))
+
+    assert all(frame.empty for frame in issues.values())
+
+def test_special_status_city_children_may_skip_levels():
+    issues = audit_hierarchy(_territories([
+        ('UA80000000000093317', 'level1_regions', 'K', None),
+        ('UA80000000000126643', 'level_additional_city_districts', 'B', 'UA80000000000093317')
+    ]))
+
+    assert issues['wrong_level'].empty
+
+def test_wrong_level_orphan_and_missing_parent():
+    issues = audit_hierarchy(_territories([
+        ('UA1', 'level1_regions', 'O', None),
+        ('UA2', 'level2_raions', 'P', 'UA1'),
+        ('UA3', 'level3_hromadas', 'H', 'UA1'),
+        ('UA4', 'level4_settlements', 'C', 'UA2'),
+        ('UA5', 'level4_settlements', 'C', 'UA9'),
+        ('UA6', 'level2_raions', 'P', None)
+    ]))
+
+    assert sorted(issues['wrong_level']['code']) == ['UA3', 'UA4']
+    assert list(issues['orphan_parent']['code']) == ['UA5']
+    assert list(issues['missing_parent']['code']) == ['UA6']
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Тести відкату імпорту: розділення злитих нормалізацією періодів
+"""
+
+from datetime import datetime
+
+import pytest
+
+from rollback_import import split_merged_periods
+from status_normalize import coalesce_periods
+from status_periods import DATABASE_NAME
+
+mongomock = pytest.importorskip('mongomock')
+
+def _period(import_id, start, end=None):
+    return {'status': 'a', 'start_date': start, 'end_date': end, 'import_id': import_id,
+            'source_document': import_id}
+
+def test_split_merged_period_with_open_ended_source():
+    client = mongomock.MongoClient()
+    merged = coalesce_periods([
+        _period('A', datetime(2022, 1, 1)),
+        _period('B', datetime(2022, 3, 1), datetime(2022, 4, 1)),
+        _period('C', datetime(2022, 5, 1), datetime(2022, 6, 1))
+    ])
+    client[DATABASE_NAME]['level3_hromadas'].insert_one({'_id': 'UA3', 'occupation_history': merged})
+
+    changed = split_merged_periods(client, 'C')
+
+    assert changed == {'UA3'}
+    history = client[DATABASE_NAME]['level3_hromadas'].find_one({'_id': 'UA3'})['occupation_history']
+    assert len(history) == 1
+    assert history[0]['start_date'] == datetime(2022, 1, 1)
+    assert history[0]['end_date'] is None
+    assert [source['import_id'] for source in history[0]['merged_from']] == ['A', 'B']
+
+def test_split_leaves_single_remaining_source_unmerged():
+    client = mongomock.MongoClient()
+    merged = coalesce_periods([
+        _period('A', datetime(2022, 1, 1)),
+        _period('B', datetime(2022, 3, 1), datetime(2022, 4, 1))
+    ])
+    client[DATABASE_NAME]['level3_hromadas'].insert_one({'_id': 'UA3', 'occupation_history': merged})
+
+    split_merged_periods(client, 'B')
+
+    history = client[DATABASE_NAME]['level3_hromadas'].find_one({'_id': 'UA3'})['occupation_history']
+    assert history == [{'status': 'a', 'start_date': datetime(2022, 1, 1), 'end_date': None,
+                        'import_id': 'A', 'source_document': 'A'}]
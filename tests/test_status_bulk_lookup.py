@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Тести розбору дат пакета масового пошуку статусів
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from status_bulk_lookup import parse_lookup_dates
+
+def test_iso_dates_are_not_read_day_first():
+    parsed = parse_lookup_dates(['2022-03-05', '2022-12-01'])
+    assert parsed.tolist() == [pd.Timestamp(2022, 3, 5), pd.Timestamp(2022, 12, 1)]
+
+def test_mixed_iso_and_day_first_formats():
+    parsed = parse_lookup_dates(['2022-03-05', '05.03.2022', ' 31.12.2023 ', 'не дата', None])
+    assert parsed.tolist()[:3] == [pd.Timestamp(2022, 3, 5), pd.Timestamp(2022, 3, 5), pd.Timestamp(2023, 12, 31)]
+    assert parsed.iloc[3:].isna().all()
+
+def test_date_objects_are_converted_directly():
+    parsed = parse_lookup_dates([date(2022, 3, 5), datetime(2022, 3, 5, 10, 30)])
+    assert parsed.tolist() == [pd.Timestamp(2022, 3, 5), pd.Timestamp(2022, 3, 5, 10, 30)]
+
+def test_parquet_date32_column(tmp_path):
+    path = tmp_path / 'pairs.parquet'
+    pd.DataFrame({'date': [date(2022, 3, 5), date(2022, 4, 1)]}).to_parquet(path, index=False)
+    parsed = parse_lookup_dates(pd.read_parquet(path)['date'])
+    assert parsed.tolist() == [pd.Timestamp(2022, 3, 5), pd.Timestamp(2022, 4, 1)]
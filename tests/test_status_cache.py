@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Тести кешу запитів "статус на дату"
+"""
+
+from datetime import datetime
+
+import pytest
+
+import status_cache
+from status_cache import cached_status_query, StatusQueryCache
+
+mongomock = pytest.importorskip('mongomock')
+
+def test_backends_do_not_share_cached_results(monkeypatch):
+    monkeypatch.setattr(status_cache, '_cache', StatusQueryCache())
+    client = mongomock.MongoClient()
+    query_date = datetime(2022, 3, 1)
+
+    engine_result = cached_status_query(client, query_date, None, lambda: ['engine'], 'engine')
+    database_result = cached_status_query(client, query_date, None, lambda: ['database'], 'database')
+
+    assert engine_result == ['engine']
+    assert database_result == ['database']
+    assert cached_status_query(client, query_date, None, lambda: ['stale'], 'engine') == ['engine']
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Тести злиття періодів статусів
+"""
+
+from datetime import datetime
+
+from status_normalize import coalesce_periods
+
+def _period(start, end=None, status='a', import_id='imp1'):
+    return {'status': status, 'start_date': start, 'end_date': end, 'import_id': import_id}
+
+def test_open_ended_period_absorbs_later_closed_period():
+    periods = [
+        _period(datetime(2022, 1, 1)),
+        _period(datetime(2022, 3, 1), datetime(2022, 4, 1), import_id='imp2')
+    ]
+
+    result = coalesce_periods(periods)
+
+    assert len(result) == 1
+    assert result[0]['start_date'] == datetime(2022, 1, 1)
+    assert result[0]['end_date'] is None
+    assert [source['import_id'] for source in result[0]['merged_from']] == ['imp1', 'imp2']
+
+def test_closed_period_extended_to_open_end():
+    result = coalesce_periods([
+        _period(datetime(2022, 1, 1), datetime(2022, 3, 1)),
+        _period(datetime(2022, 2, 1))
+    ])
+
+    assert [(period['start_date'], period['end_date']) for period in result] == [(datetime(2022, 1, 1), None)]
+
+def test_adjacent_periods_are_merged():
+    result = coalesce_periods([
+        _period(datetime(2022, 1, 1), datetime(2022, 1, 31)),
+        _period(datetime(2022, 2, 1), datetime(2022, 2, 28))
+    ])
+
+    assert [(period['start_date'], period['end_date']) for period in result] == [
+        (datetime(2022, 1, 1), datetime(2022, 2, 28))
+    ]
+
+def test_overlapping_periods_keep_latest_end():
+    result = coalesce_periods([
+        _period(datetime(2022, 1, 1), datetime(2022, 6, 1)),
+        _period(datetime(2022, 3, 1), datetime(2022, 4, 1))
+    ])
+
+    assert [(period['start_date'], period['end_date']) for period in result] == [
+        (datetime(2022, 1, 1), datetime(2022, 6, 1))
+    ]
+
+def test_separated_periods_stay_unchanged():
+    periods = [
+        _period(datetime(2022, 1, 1), datetime(2022, 1, 31)),
+        _period(datetime(2022, 3, 1), datetime(2022, 3, 31))
+    ]
+
+    assert coalesce_periods(periods) == periods
+
+def test_different_statuses_are_not_merged():
+    periods = [
+        _period(datetime(2022, 1, 1), status='a'),
+        _period(datetime(2022, 2, 1), datetime(2022, 3, 1), status='b')
+    ]
+
+    assert coalesce_periods(periods) == periods
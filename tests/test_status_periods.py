@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Тести запиту статусів на дату по плоскій колекції періодів
+"""
+
+from datetime import datetime
+
+import pytest
+
+from status_engine import get_status_on_date_from_engine
+from status_periods import get_status_periods_on_date, DATABASE_NAME, STATUS_PERIODS_COLLECTION
+
+mongomock = pytest.importorskip('mongomock')
+
+def _period(code, start, end=None):
+    return {
+        'territory_code': code, 'level': 'level4_settlements', 'level_rank': 4, 'name': code,
+        'category': 'C', 'status': 'Тимчасово окуповані території',
+        'start_date': start, 'end_date': end, 'source': 'own'
+    }
+
+def test_period_without_start_date_is_active():
+    client = mongomock.MongoClient()
+    client[DATABASE_NAME][STATUS_PERIODS_COLLECTION].insert_many([
+        _period('UA1', None),
+        _period('UA2', datetime(2023, 1, 1)),
+        _period('UA3', datetime(2021, 1, 1), datetime(2021, 6, 1)),
+        _period('UA4', None, datetime(2021, 6, 1))
+    ])
+
+    territories = get_status_periods_on_date(client, datetime(2022, 1, 1))
+
+    assert [territory['code'] for territory in territories] == ['UA1']
+
+def test_engine_agrees_on_period_without_start_date():
+    client = mongomock.MongoClient()
+    client[DATABASE_NAME][STATUS_PERIODS_COLLECTION].insert_many([
+        _period('UA1', None),
+        _period('UA3', datetime(2021, 1, 1), datetime(2021, 6, 1))
+    ])
+
+    territories = get_status_on_date_from_engine(client, datetime(2022, 1, 1))
+
+    assert [territory['code'] for territory in territories] == ['UA1']
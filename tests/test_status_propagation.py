@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Тести успадкування статусів по ієрархії
+"""
+
+from datetime import datetime
+
+from status_propagation import compute_inherited_periods
+
+OCCUPIED = 'Тимчасово окуповані території'
+
+def _node(collection, parent_code=None, **own_periods):
+    return {
+        'collection': collection,
+        'name': collection,
+        'parent_code': parent_code,
+        'own_periods': own_periods,
+        'current_inherited': []
+    }
+
+def _period(start, end=None, status=OCCUPIED):
+    return {'status': status, 'start_date': start, 'end_date': end}
+
+def test_own_period_shadows_only_overlapping_parent_periods():
+    nodes = {
+        'UA3': _node('level3_hromadas', occupation_history=[
+            _period(datetime(2022, 3, 1), datetime(2022, 11, 11)),
+            _period(datetime(2023, 6, 1))
+        ]),
+        'UA4': _node('level4_settlements', 'UA3', occupation_history=[
+            _period(datetime(2022, 3, 5), datetime(2022, 10, 1))
+        ]),
+        'UA5': _node('level_additional_city_districts', 'UA4')
+    }
+
+    inherited = compute_inherited_periods(nodes)
+
+    # Населений пункт успадковує лише період громади, що не перетинається з власним
+    assert [period['start_date'] for period in inherited['UA4']] == [datetime(2023, 6, 1)]
+
+    # Нащадок отримує власний період батька та неперекритий період громади
+    assert sorted((period['inherited_from'], period['start_date']) for period in inherited['UA5']) == [
+        ('UA3', datetime(2023, 6, 1)),
+        ('UA4', datetime(2022, 3, 5))
+    ]
+
+def test_other_history_fields_are_not_shadowed():
+    nodes = {
+        'UA3': _node('level3_hromadas', combat_history=[_period(datetime(2022, 2, 24))]),
+        'UA4': _node('level4_settlements', 'UA3', occupation_history=[_period(datetime(2022, 3, 1))])
+    }
+
+    inherited = compute_inherited_periods(nodes)
+
+    assert [period['history_field'] for period in inherited['UA4']] == ['combat_history']
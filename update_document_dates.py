@@ -12,6 +12,8 @@ from urllib.parse import quote_plus
 from datetime import datetime
 import json
 
+from status_periods import rebuild_status_periods
+
 # РЯДОК ПІДКЛЮЧЕННЯ ДО MONGODB ATLAS
 username = quote_plus("test")
 password = quote_plus("test")
@@ -28,6 +30,9 @@ DOCUMENT_CONFIG = {
     'document_description': 'Документ Перелік 07052025 від 7 травня 2025 року'
 }
 
+# Історії статусів, у періодах яких оновлюються дати документа
+HISTORY_FIELDS = ['occupation_history', 'combat_history', 'status_history']
+
 def connect_to_mongodb():
     """Підключення до MongoDB Atlas"""
     try:
@@ -40,9 +45,69 @@ def connect_to_mongodb():
         print(f"❌ Помилка підключення до MongoDB: {e}")
         return None
 
+def history_filter():
+    """
+    Фільтр територій з історією статусів
+    """
+    return {"$or": [{field: {"$exists": True}} for field in HISTORY_FIELDS]}
+
+def outdated_periods_filter():
+    """
+    Фільтр територій, у яких хоча б один період потребує оновлення дати документа
+    """
+    outdated_period = {
+        "$or": [
+            {"document_date": {"$ne": DOCUMENT_CONFIG['document_date']}},
+            {"document_date_iso": {"$exists": False}},
+            {"source_document": {"$ne": DOCUMENT_CONFIG['document_name']}}
+        ]
+    }
+    return {"$or": [{field: {"$elemMatch": outdated_period}} for field in HISTORY_FIELDS]}
+
+def document_dates_update():
+    """
+    Оновлення-pipeline: $map по кожній історії проставляє читабельну дату та джерело
+    документа, ISO дату - лише якщо її немає; відсутні історії не створюються
+    """
+    def patched_history(field):
+        return {
+            "$cond": [
+                {"$isArray": f"${field}"},
+                {
+                    "$map": {
+                        "input": f"${field}",
+                        "as": "period",
+                        "in": {
+                            "$mergeObjects": [
+                                "$$period",
+                                {
+                                    "document_date": DOCUMENT_CONFIG['document_date'],
+                                    "document_date_iso": {
+                                        "$ifNull": ["$$period.document_date_iso", DOCUMENT_CONFIG['document_date_iso']]
+                                    },
+                                    "source_document": DOCUMENT_CONFIG['document_name']
+                                }
+                            ]
+                        }
+                    }
+                },
+                "$$REMOVE"
+            ]
+        }
+
+    return [
+        {
+            "$set": {
+                **{field: patched_history(field) for field in HISTORY_FIELDS},
+                "last_status_update": "$$NOW"
+            }
+        }
+    ]
+
 def update_document_dates(client):
     """
-    Оновлення існуючих записів, додаючи читабельний формат дати документа
+    Оновлення існуючих записів, додаючи читабельний формат дати документа:
+    один update_many з pipeline на колекцію, переписування історій на сервері
     """
     db = client[DATABASE_NAME]
     
@@ -65,78 +130,13 @@ def update_document_dates(client):
     total_errors = 0
     
     for collection_name in collections:
-        print(f"\n📊 Колекція: {collection_name}")
-        print("-" * 40)
-        
-        collection = db[collection_name]
-        
-        # Знаходимо території з історією статусів
-        territories = collection.find({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        collection_updated = 0
-        collection_errors = 0
-        
-        for territory in territories:
-            try:
-                needs_update = False
-                update_data = {}
-                
-                # Перевіряємо кожне поле історії
-                for history_field in ['occupation_history', 'combat_history', 'status_history']:
-                    if history_field in territory and territory[history_field]:
-                        updated_history = []
-                        
-                        for period in territory[history_field]:
-                            updated_period = period.copy()
-                            
-                            # Додаємо читабельну дату, якщо її немає
-                            if 'document_date' not in period or period['document_date'] != DOCUMENT_CONFIG['document_date']:
-                                updated_period['document_date'] = DOCUMENT_CONFIG['document_date']
-                                needs_update = True
-                            
-                            # Додаємо ISO дату, якщо її немає
-                            if 'document_date_iso' not in period:
-                                updated_period['document_date_iso'] = DOCUMENT_CONFIG['document_date_iso']
-                                needs_update = True
-                            
-                            # Оновлюємо джерело документа, якщо потрібно
-                            if 'source_document' not in period or period['source_document'] != DOCUMENT_CONFIG['document_name']:
-                                updated_period['source_document'] = DOCUMENT_CONFIG['document_name']
-                                needs_update = True
-                            
-                            updated_history.append(updated_period)
-                        
-                        if needs_update:
-                            update_data[history_field] = updated_history
-                
-                # Оновлюємо документ, якщо є зміни
-                if needs_update:
-                    result = collection.update_one(
-                        {"_id": territory["_id"]},
-                        {"$set": update_data}
-                    )
-                    
-                    if result.modified_count > 0:
-                        collection_updated += 1
-                        total_updated += 1
-                        print(f"  ✅ Оновлено: {territory['name']}")
-                    else:
-                        collection_errors += 1
-                        total_errors += 1
-                        print(f"  ❌ Помилка оновлення: {territory['name']}")
-                
-            except Exception as e:
-                collection_errors += 1
-                total_errors += 1
-                print(f"  ❌ Помилка обробки {territory.get('name', 'невідома територія')}: {e}")
-        
-        print(f"  📊 Оновлено: {collection_updated}, помилок: {collection_errors}")
+        try:
+            result = db[collection_name].update_many(outdated_periods_filter(), document_dates_update())
+            total_updated += result.modified_count
+            print(f"  📊 {collection_name}: оновлено {result.modified_count}")
+        except Exception as e:
+            total_errors += 1
+            print(f"  ❌ {collection_name}: помилка оновлення: {e}")
     
     print(f"\n📈 ЗАГАЛЬНА СТАТИСТИКА ОНОВЛЕННЯ:")
     print("-" * 40)
@@ -147,7 +147,7 @@ def update_document_dates(client):
 
 def verify_updates(client):
     """
-    Перевірка результатів оновлення
+    Перевірка результатів оновлення однією агрегацією по всіх колекціях
     """
     db = client[DATABASE_NAME]
     
@@ -162,40 +162,42 @@ def verify_updates(client):
     print(f"\n🔍 ПЕРЕВІРКА РЕЗУЛЬТАТІВ ОНОВЛЕННЯ:")
     print("=" * 60)
     
+    def readable_dates_stages(collection_name):
+        document_dates = {"$concatArrays": [
+            {"$ifNull": [f"${field}.document_date", []]} for field in HISTORY_FIELDS
+        ]}
+        return [
+            {"$match": history_filter()},
+            {
+                "$project": {
+                    "_id": 0,
+                    "collection": {"$literal": collection_name},
+                    "has_readable_dates": {"$in": [DOCUMENT_CONFIG['document_date'], document_dates]}
+                }
+            }
+        ]
+    
+    pipeline = readable_dates_stages(collections[0])
+    pipeline += [
+        {"$unionWith": {"coll": collection_name, "pipeline": readable_dates_stages(collection_name)}}
+        for collection_name in collections[1:]
+    ]
+    pipeline.append({
+        "$group": {
+            "_id": "$collection",
+            "with_readable": {"$sum": {"$cond": ["$has_readable_dates", 1, 0]}},
+            "without_readable": {"$sum": {"$cond": ["$has_readable_dates", 0, 1]}}
+        }
+    })
+    
+    counts = {group['_id']: group for group in db[collections[0]].aggregate(pipeline)}
+    
     total_with_readable_dates = 0
     total_without_readable_dates = 0
     
     for collection_name in collections:
-        collection = db[collection_name]
-        
-        # Знаходимо території з історією статусів
-        territories = collection.find({
-            "$or": [
-                {"occupation_history": {"$exists": True}},
-                {"combat_history": {"$exists": True}},
-                {"status_history": {"$exists": True}}
-            ]
-        })
-        
-        collection_with_readable = 0
-        collection_without_readable = 0
-        
-        for territory in territories:
-            has_readable_dates = False
-            
-            for history_field in ['occupation_history', 'combat_history', 'status_history']:
-                if history_field in territory:
-                    for period in territory[history_field]:
-                        if 'document_date' in period and period['document_date'] == DOCUMENT_CONFIG['document_date']:
-                            has_readable_dates = True
-                            break
-                    if has_readable_dates:
-                        break
-            
-            if has_readable_dates:
-                collection_with_readable += 1
-            else:
-                collection_without_readable += 1
+        collection_with_readable = counts.get(collection_name, {}).get('with_readable', 0)
+        collection_without_readable = counts.get(collection_name, {}).get('without_readable', 0)
         
         total_with_readable_dates += collection_with_readable
         total_without_readable_dates += collection_without_readable
@@ -240,6 +242,9 @@ def main():
         # Перевіряємо результати
         verify_updates(client)
         
+        # Пласка колекція містить дати документів - перебудовуємо її (це також змінює версію даних)
+        rebuild_status_periods(client)
+        
         print(f"\n✅ Оновлення завершено!")
         print(f"📊 Оновлено записів: {updated}")
         print(f"❌ Помилок: {errors}")